@@ -25,7 +25,7 @@ o1, o2, o3, s1, s2, s3 = sp.symbols("o1 o2 o3 s1 s2 s3")
 
 rotation_eqs = [sp.Eq(o1, -s2), sp.Eq(o2, s1), sp.Eq(o3, s3)]
 
-rotation_res = Reservoir.solve(rotation_eqs)
+rotation_res = Reservoir.solve(rotation_eqs, split=True)
 print("Solved Rotation")
 
 """ 2. Define program & compile to Graph ------------------------------ """
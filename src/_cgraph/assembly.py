@@ -0,0 +1,251 @@
+""" Assembly planner: lays out a CGraph's reservoirs in one composite """
+
+import numpy as np
+from _cgraph.cgraph import CGraph
+from _prnn.reservoir import Reservoir, _dense
+from _prnn.instanced import InstancedReservoir
+
+
+class AssemblyPlan:
+    """
+    Decides where every constituent block of A, B, W, d, x_init and r_init
+    lands in the composite, using the input_idx/output_idx carried on edges:
+    * rows[node]: first neuron of each reservoir node
+    * in_cols[node]: (local input, composite column) for inputs that stay external
+    * out_rows[node]: (local output, composite row) for readouts that stay external
+    * links: (target node, local input, source node, local output) per var,
+      internalized into A as B[:, input] W[output, :]
+    * constants: (node, local input, value) for constant inputs folded into d
+    Inputs with all-zero B columns are dropped, and a graph input feeding several
+    ports shares one column. Remaining inputs and readouts are ordered by
+    reservoir node, then by local index; arguments feeding nothing come last,
+    as zero columns. Given a signature (inputs/outputs names), those come first
+    and in that order, with a zero column for any input that feeds nothing.
+    """
+
+    def __init__(
+        self, graph: CGraph, inputs: list[str] = None, outputs: list[str] = None
+    ):
+        self.graph = graph
+        self.nodes: list[str] = graph.nodes_of_type("reservoir")
+        self.rows: dict[str, int] = {}
+        self.dim = 0
+        for node in self.nodes:
+            self.rows[node] = self.dim
+            self.dim += self.reservoir(node).A.shape[0]
+
+        self.in_cols: dict[str, list[tuple[int, int]]] = {}
+        self.out_rows: dict[str, list[tuple[int, int]]] = {}
+        self.links: list[tuple[str, int, str, int]] = []
+        self.constants: list[tuple[str, int, float]] = []
+        self.input_names: list[str] = []
+        # input name -> column, so planning stays linear in the number of ports
+        self.input_cols: dict[str, int] = {}
+        self.output_names: list[str] = []
+        for node in self.nodes:
+            self._plan_inputs(node)
+            self._plan_outputs(node)
+        # arguments left without consumers (e.g. pruned) keep a zero column
+        for node in graph.nodes_of_type("input"):
+            unused = not graph.out_edges(node) and node not in self.input_cols
+            if unused and graph.get_node(node).get("value") is None:
+                self._add_input(node)
+        if inputs is not None:
+            self._order_inputs(inputs)
+        if outputs is not None:
+            self._order_outputs(outputs)
+
+    def reservoir(self, node: str) -> Reservoir:
+        return self.graph.get_node(node)["reservoir"]
+
+    def _io(self, node: str) -> tuple[np.ndarray, np.ndarray]:
+        """Dense B and W of a constituent (small: neurons x ports)"""
+        res = self.reservoir(node)
+        return _dense(res.B), _dense(res.W)
+
+    def _type(self, node: str) -> str:
+        return self.graph.get_node(node)["type"]
+
+    def _plan_inputs(self, node: str):
+        B = self._io(node)[0]
+        sources = {data["input_idx"]: src for src, data in self.graph.in_edges(node)}
+
+        cols = []
+        for j in range(B.shape[1]):
+            src = sources.get(j)
+            if src is not None and self._type(src) == "var":
+                preds = self.graph.in_edges(src)
+                if len(preds) == 1 and self._type(preds[0][0]) == "reservoir":
+                    self.links.append((node, j, preds[0][0], preds[0][1]["output_idx"]))
+                    continue
+            if not np.any(B[:, j]):
+                continue
+            if src is not None and self.graph.get_node(src).get("value") is not None:
+                self.constants.append((node, j, self.graph.get_node(src)["value"]))
+                continue
+            if src is not None and src in self.input_cols:
+                # one column per graph input, however many ports it fans out to
+                cols.append((j, self.input_cols[src]))
+                continue
+            name = src if src is not None else f"{node}_i{j}"
+            cols.append((j, self._add_input(name)))
+        self.in_cols[node] = cols
+
+    def _add_input(self, name: str) -> int:
+        self.input_cols[name] = len(self.input_names)
+        self.input_names.append(name)
+        return self.input_cols[name]
+
+    def _plan_outputs(self, node: str):
+        W = self._io(node)[1]
+        targets: dict[int, list[str]] = {}
+        for dst, data in self.graph.out_edges(node):
+            targets.setdefault(data["output_idx"], []).append(dst)
+
+        unused = self.graph.get_node(node).get("unused_outputs", ())
+        rows = []
+        for i in range(W.shape[0]):
+            if i in unused:
+                continue  # pruned (see _cgraph.passes.eliminate_dead)
+            external = [t for t in targets.get(i, []) if self._type(t) != "var"]
+            if targets.get(i) and not external:
+                continue  # only feeds other reservoirs
+            # one row per external target (a readout can fan out to several)
+            for name in external or [f"{node}_o{i}"]:
+                rows.append((i, len(self.output_names)))
+                self.output_names.append(name)
+        self.out_rows[node] = rows
+
+    def _order_inputs(self, wanted: list[str]):
+        first = set(wanted)
+        names = list(wanted) + [n for n in self.input_names if n not in first]
+        col = {name: k for k, name in enumerate(names)}
+        old = self.input_names
+        for node, cols in self.in_cols.items():
+            self.in_cols[node] = [(j, col[old[c]]) for j, c in cols]
+        self.input_names = names
+        self.input_cols = col
+
+    def _order_outputs(self, wanted: list[str]):
+        present = set(self.output_names)
+        names = [n for n in wanted if n in present]
+        first = set(names)
+        names += [n for n in self.output_names if n not in first]
+        row = {name: k for k, name in enumerate(names)}
+        old = self.output_names
+        for node, rows in self.out_rows.items():
+            self.out_rows[node] = [(i, row[old[r]]) for i, r in rows]
+        self.output_names = names
+
+    def instanced(self) -> InstancedReservoir:
+        """
+        The planned composite in flyweight form: reservoir nodes sharing one
+        Reservoir object become instances of a single prototype.
+        """
+        prototypes, proto_idx, proto = [], {}, []
+        for node in self.nodes:
+            res = self.reservoir(node)
+            if id(res) not in proto_idx:
+                proto_idx[id(res)] = len(prototypes)
+                prototypes.append(res)
+            proto.append(proto_idx[id(res)])
+        inst = {node: k for k, node in enumerate(self.nodes)}
+
+        d = np.zeros((self.dim, 1))
+        r_init = np.zeros((self.dim, 1))
+        x_init = np.zeros((max(len(self.input_names), 1), 1))
+        inputs, outputs = [], []
+        for node in self.nodes:
+            res = self.reservoir(node)
+            lo, hi = self.rows[node], self.rows[node] + res.A.shape[0]
+            d[lo:hi] = np.asarray(res.d).reshape(-1, 1)
+            r_init[lo:hi] = np.asarray(res.r_init).reshape(-1, 1)
+            for local, col in self.in_cols[node]:
+                inputs.append((inst[node], local, col))
+                x_init[col] = res.x_init[local]
+            for local, row in self.out_rows[node]:
+                outputs.append((inst[node], local, row))
+
+        for node, j, value in self.constants:
+            lo = self.rows[node]
+            B = self._io(node)[0]
+            d[lo : lo + B.shape[0]] += B[:, j : j + 1] * value
+
+        return InstancedReservoir(
+            prototypes,
+            proto,
+            [self.rows[node] for node in self.nodes],
+            couplings=[(inst[t], j, inst[s], i) for t, j, s, i in self.links],
+            inputs=inputs,
+            outputs=outputs,
+            d=d,
+            r_init=r_init,
+            x_init=x_init,
+            global_timescale=0.001,
+            gamma=100,
+            names=list(self.nodes),
+            input_names=list(self.input_names),
+            output_names=list(self.output_names),
+        )
+
+    def assemble(self, sparse=False, sparse_io=False) -> Reservoir:
+        """
+        Materializes the composite. sparse: build A as a scipy.sparse CSR array
+        from COO triplets, so memory scales with the non-zeros; sparse_io:
+        likewise for B and W.
+        """
+        return self.instanced().materialize(sparse=sparse, sparse_io=sparse_io)
+
+    def layout(self) -> tuple:
+        """Everything that fixes where blocks land; equal layouts can be patched"""
+        return (
+            self.dim,
+            self.rows,
+            self.in_cols,
+            self.out_rows,
+            self.links,
+            [(node, j) for node, j, _ in self.constants],
+            self.input_names,
+            self.output_names,
+        )
+
+    def write(self, target: Reservoir, nodes: list[str]):
+        """
+        Rewrites, in place, the blocks of a dense composite assembled from this
+        layout that depend on `nodes`: their diagonal blocks of A, coupling
+        blocks to and from them, B columns, W rows and d/r_init/x_init entries.
+        """
+        nodes = set(nodes)
+
+        def span(node: str) -> slice:
+            return slice(
+                self.rows[node], self.rows[node] + self.reservoir(node).A.shape[0]
+            )
+
+        # links grouped by block, so each block is rebuilt from its own links only
+        by_pair: dict[tuple[str, str], list[tuple[int, int]]] = {}
+        for t, j, s, i in self.links:
+            if t in nodes or s in nodes:
+                by_pair.setdefault((t, s), []).append((j, i))
+        pairs = {(node, node) for node in nodes} | set(by_pair)
+
+        for tar, src in pairs:
+            block = _dense(self.reservoir(tar).A).copy() if tar == src else 0.0
+            for j, i in by_pair.get((tar, src), ()):
+                block = block + np.outer(self._io(tar)[0][:, j], self._io(src)[1][i])
+            target.A[span(tar), span(src)] = block
+
+        for node in nodes:
+            res = self.reservoir(node)
+            B, W = self._io(node)
+            rows = span(node)
+            target.d[rows] = np.asarray(res.d).reshape(-1, 1)
+            target.r_init[rows] = np.asarray(res.r_init).reshape(-1, 1)
+            for local, col in self.in_cols[node]:
+                target.B[rows, col] = B[:, local]
+                target.x_init[col] = res.x_init[local]
+            for local, row in self.out_rows[node]:
+                target.W[row, rows] = W[local]
+        for node, j, value in self.constants:
+            if node in nodes:
+                target.d[span(node)] += self._io(node)[0][:, j : j + 1] * value
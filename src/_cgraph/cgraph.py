@@ -67,6 +67,24 @@ class CGraph:
         edge_data = self.graph.get_edge_data(name, target)
         return (self.graph.nodes[target]["reservoir"], edge_data["input_idx"])
 
+    def nodes_of_type(self, node_type: str) -> list[str]:
+        """
+        Returns the names of all nodes of the given type, in insertion order.
+        """
+        return [n for n, t in self.graph.nodes(data="type") if t == node_type]
+
+    def in_edges(self, name: str) -> list[tuple[str, dict]]:
+        """
+        Returns (source, edge data) for every edge into the node.
+        """
+        return [(src, data) for src, _, data in self.graph.in_edges(name, data=True)]
+
+    def out_edges(self, name: str) -> list[tuple[str, dict]]:
+        """
+        Returns (target, edge data) for every edge out of the node.
+        """
+        return [(dst, data) for _, dst, data in self.graph.out_edges(name, data=True)]
+
     def all_nodes(self):
         """
         Returns all nodes in the graph.
@@ -156,6 +174,12 @@ class CGraph:
 
         self.graph.add_edge(source, target, output_idx=out_idx, input_idx=in_idx)
 
+    def remove_node(self, name: str):
+        """
+        Removes a node and all of its edges.
+        """
+        self.graph.remove_node(name)
+
     def update_var_name(self, old_name: str, new_name: str):
         """
         Updates the name of a variable node in the graph, preserving all edges and attributes.
@@ -266,7 +290,8 @@ class CGraph:
     def validate(self):
         """
         Validates the structure of the graph by ensuring:
-        - Input nodes have exactly one output.
+        - Input nodes have exactly one output (arguments, inputs without a
+          value, at most one: their consumers may have been pruned).
         - Output nodes have exactly one input.
         - Variable nodes have exactly one input and one output.
         - Reservoir nodes maintain valid input/output indices.
@@ -276,7 +301,10 @@ class CGraph:
 
             if node_type == "input":
                 # Input nodes should have exactly one outgoing edge
-                if self.graph.out_degree(node) != 1:
+                unused_arg = (
+                    data.get("value") is None and self.graph.out_degree(node) == 0
+                )
+                if self.graph.out_degree(node) != 1 and not unused_arg:
                     raise ValueError(f"Input node {node} must have exactly one output.")
                 if self.graph.in_degree(node) != 0:
                     raise ValueError(f"Input node {node} should not have any inputs.")
@@ -0,0 +1,390 @@
+""" Array-backed CGraph: same interface, no networkx """
+
+from array import array
+import numpy as np
+import networkx as nx
+from _cgraph.cgraph import CGraph
+from _prnn.reservoir import Reservoir
+
+KINDS = ("input", "var", "reservoir", "output", "return")
+_NONE = -1  # absent input_idx / output_idx
+_DEAD = -1  # kind of a removed node
+
+
+class _NodeView:
+    """Dict-like view of one node's attributes, as CGraph.get_node returns"""
+
+    __slots__ = ("g", "i")
+
+    def __init__(self, g: "CompactCGraph", i: int):
+        self.g = g
+        self.i = i
+
+    def __getitem__(self, key: str):
+        if key == "type":
+            return KINDS[self.g.kind[self.i]]
+        store = self.g._store(key)
+        if self.i not in store:
+            raise KeyError(key)
+        return store[self.i]
+
+    def __setitem__(self, key: str, value):
+        if key == "type":
+            self.g.kind[self.i] = KINDS.index(value)
+        else:
+            self.g._store(key, create=True)[self.i] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key == "type" or self.i in self.g._store(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, attrs: dict):
+        for key, value in attrs.items():
+            self[key] = value
+
+    def keys(self) -> list[str]:
+        return ["type"] + [k for k, store in self.g.attrs.items() if self.i in store]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class CompactCGraph:
+    """
+    Drop-in replacement for CGraph for large programs. Node names are interned
+    to integer ids with a kind array; attributes live in one id-keyed dict per
+    attribute (reservoir, value, ...). Edges are flat arrays of source, target,
+    output_idx and input_idx. While the graph is being built, per-node incidence
+    lists support edits; the first query afterwards freezes them into CSR arrays.
+    get_graph() and draw() build a networkx graph on demand.
+    """
+
+    def __init__(self):
+        self.names: list[str] = []
+        self.ids: dict[str, int] = {}
+        self.kind = array("b")
+        self.attrs: dict[str, dict[int, object]] = {"reservoir": {}, "value": {}}
+        self.src = array("q")
+        self.dst = array("q")
+        self.out_idx = array("q")
+        self.in_idx = array("q")
+        self.alive = bytearray()
+        # per-node edge ids while building; None once frozen into CSR
+        self._succ: list[list[int]] = []
+        self._pred: list[list[int]] = []
+        self._csr: tuple = None
+
+    """
+    Storage
+    """
+
+    def _store(self, key: str, create=False) -> dict:
+        if create:
+            return self.attrs.setdefault(key, {})
+        return self.attrs.get(key, {})
+
+    def _id(self, name: str) -> int:
+        return self.ids[name]
+
+    def _thaw(self):
+        """Incidence lists for edits (after a freeze)"""
+        self._csr = None
+        if self._succ is not None:
+            return
+        self._succ = [[] for _ in self.names]
+        self._pred = [[] for _ in self.names]
+        for e in np.flatnonzero(np.frombuffer(self.alive, dtype=np.uint8)):
+            self._succ[self.src[e]].append(int(e))
+            self._pred[self.dst[e]].append(int(e))
+
+    def _freeze(self) -> tuple:
+        """(out_ptr, out_eids, in_ptr, in_eids) CSR arrays over live edges"""
+        if self._csr is None:
+            live = np.flatnonzero(np.frombuffer(self.alive, dtype=np.uint8))
+            n = len(self.names)
+            src = np.frombuffer(self.src, dtype=np.int64)[live]
+            dst = np.frombuffer(self.dst, dtype=np.int64)[live]
+            out_eids = live[np.argsort(src, kind="stable")]
+            in_eids = live[np.argsort(dst, kind="stable")]
+            out_ptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=n))])
+            in_ptr = np.concatenate([[0], np.cumsum(np.bincount(dst, minlength=n))])
+            self._csr = (out_ptr, out_eids, in_ptr, in_eids)
+            self._succ = self._pred = None
+        return self._csr
+
+    def _out(self, i: int) -> list[int]:
+        if self._succ is not None:
+            return self._succ[i]
+        out_ptr, out_eids, _, _ = self._freeze()
+        return out_eids[out_ptr[i] : out_ptr[i + 1]].tolist()
+
+    def _in(self, i: int) -> list[int]:
+        if self._pred is not None:
+            return self._pred[i]
+        _, _, in_ptr, in_eids = self._freeze()
+        return in_eids[in_ptr[i] : in_ptr[i + 1]].tolist()
+
+    def _edge_data(self, e: int) -> dict:
+        out_idx, in_idx = self.out_idx[e], self.in_idx[e]
+        return {
+            "output_idx": None if out_idx == _NONE else out_idx,
+            "input_idx": None if in_idx == _NONE else in_idx,
+        }
+
+    def _put_edge(self, u: int, v: int, output_idx=None, input_idx=None):
+        """networkx semantics: one edge per (u, v), re-adding overwrites its data"""
+        self._thaw()
+        out_idx = _NONE if output_idx is None else output_idx
+        in_idx = _NONE if input_idx is None else input_idx
+        for e in self._succ[u]:
+            if self.dst[e] == v:
+                self.out_idx[e], self.in_idx[e] = out_idx, in_idx
+                return
+        e = len(self.src)
+        self.src.append(u)
+        self.dst.append(v)
+        self.out_idx.append(out_idx)
+        self.in_idx.append(in_idx)
+        self.alive.append(1)
+        self._succ[u].append(e)
+        self._pred[v].append(e)
+
+    def _remove_node(self, i: int):
+        self._thaw()
+        for e in self._succ[i] + self._pred[i]:
+            if self.alive[e]:
+                self.alive[e] = 0
+                self._succ[self.src[e]].remove(e)
+                self._pred[self.dst[e]].remove(e)
+        self.kind[i] = _DEAD
+        del self.ids[self.names[i]]
+        for store in self.attrs.values():
+            store.pop(i, None)
+
+    def _live(self) -> np.ndarray:
+        return np.flatnonzero(np.frombuffer(self.kind, dtype=np.int8) != _DEAD)
+
+    """
+    CGraph interface
+    """
+
+    def add_node(self, name: str, node_type: str, **attrs):
+        """Adds a node, or updates the type and attributes of an existing one"""
+        if name not in self.ids:
+            i = len(self.names)
+            self.ids[name] = i
+            self.names.append(name)
+            self.kind.append(KINDS.index(node_type))
+            if self._succ is not None:
+                self._succ.append([])
+                self._pred.append([])
+            else:
+                self._csr = None
+        node = self.get_node(name)
+        node.update(attrs)
+        node["type"] = node_type
+
+    def get_node(self, name: str) -> _NodeView:
+        return _NodeView(self, self._id(name))
+
+    def get_var_source(self, name: str) -> tuple[Reservoir, int]:
+        preds = self._in(self._id(name))
+        if len(preds) != 1:
+            raise ValueError(
+                f"Variable {name} should have exactly one source, but has {len(preds)}"
+            )
+        e = preds[0]
+        return (self.attrs["reservoir"][self.src[e]], self._edge_data(e)["output_idx"])
+
+    def get_var_target(self, name: str) -> tuple[Reservoir, int]:
+        succs = self._out(self._id(name))
+        if len(succs) != 1:
+            raise ValueError(
+                f"Variable {name} should have exactly one target, but has {len(succs)}"
+            )
+        e = succs[0]
+        return (self.attrs["reservoir"][self.dst[e]], self._edge_data(e)["input_idx"])
+
+    def nodes_of_type(self, node_type: str) -> list[str]:
+        kind = np.frombuffer(self.kind, dtype=np.int8)
+        return [self.names[i] for i in np.flatnonzero(kind == KINDS.index(node_type))]
+
+    def in_edges(self, name: str) -> list[tuple[str, dict]]:
+        return [
+            (self.names[self.src[e]], self._edge_data(e))
+            for e in self._in(self._id(name))
+        ]
+
+    def out_edges(self, name: str) -> list[tuple[str, dict]]:
+        return [
+            (self.names[self.dst[e]], self._edge_data(e))
+            for e in self._out(self._id(name))
+        ]
+
+    def all_nodes(self) -> list[str]:
+        return [self.names[i] for i in self._live()]
+
+    def all_edges(self) -> list[tuple[str, str]]:
+        return [
+            (self.names[self.src[e]], self.names[self.dst[e]])
+            for e in np.flatnonzero(np.frombuffer(self.alive, dtype=np.uint8))
+        ]
+
+    def add_input(self, name: str, val: float = None):
+        self.add_node(name, "input", value=val)
+
+    def make_return(self, name: str):
+        assert name in self.ids, f"Node {name} does not exist"
+        i = self._id(name)
+        assert (
+            KINDS[self.kind[i]] != "reservoir"
+        ), f"Cannot convert reservoir {name} to return"
+        assert (
+            len(self._out(i)) == 0
+        ), f"Node {name} already has outputs, cannot convert to return"
+        self.kind[i] = KINDS.index("return")
+
+    def add_var(self, name: str):
+        self.add_node(name, "var")
+
+    def add_reservoir(self, name: str, reservoir: Reservoir):
+        self.add_node(name, "reservoir", reservoir=reservoir)
+
+    def add_output(self, name: str):
+        node = self.get_node(name)
+        if node:
+            if node["type"] == "var":
+                self.make_return(name)
+                return
+            elif node["type"] == "input":
+                name = name + "_out"
+        self.add_node(name, "output")
+
+    def add_edge(
+        self, source: str, target: str, out_idx: int = None, in_idx: int = None
+    ):
+        assert source in self.ids, f"Source node {source} does not exist"
+        assert target in self.ids, f"Target node {target} does not exist"
+        u, v = self._id(source), self._id(target)
+
+        if KINDS[self.kind[u]] == "reservoir":
+            assert (
+                out_idx is not None
+            ), "output_idx is required when source is a reservoir"
+        else:
+            out_idx = None
+        if KINDS[self.kind[v]] == "reservoir":
+            assert (
+                in_idx is not None
+            ), "input_idx is required when target is a reservoir"
+        else:
+            in_idx = None
+        self._put_edge(u, v, out_idx, in_idx)
+
+    def remove_node(self, name: str):
+        self._remove_node(self._id(name))
+
+    def update_var_name(self, old_name: str, new_name: str):
+        """Renames old_name, merging it into new_name if that already exists"""
+        if old_name not in self.ids:
+            raise ValueError(f"Node {old_name} does not exist.")
+        old = self._id(old_name)
+        if new_name not in self.ids:
+            del self.ids[old_name]
+            self.ids[new_name] = old
+            self.names[old] = new_name
+            return
+
+        new = self._id(new_name)
+        self.get_node(new_name).update(dict(self.get_node(old_name).items()))
+        self._thaw()
+        for e in list(self._pred[old]):
+            self._put_edge(self.src[e], new, *self._edge_data(e).values())
+        for e in list(self._succ[old]):
+            self._put_edge(new, self.dst[e], *self._edge_data(e).values())
+        self._remove_node(old)
+
+    def get_graph(self) -> nx.DiGraph:
+        """networkx copy of the graph (for drawing and debugging)"""
+        graph = nx.DiGraph()
+        for name in self.all_nodes():
+            graph.add_node(name, **dict(self.get_node(name).items()))
+        for e in np.flatnonzero(np.frombuffer(self.alive, dtype=np.uint8)):
+            graph.add_edge(
+                self.names[self.src[e]], self.names[self.dst[e]], **self._edge_data(e)
+            )
+        return graph
+
+    def print(self):
+        print("Graph nodes:")
+        for name in self.all_nodes():
+            print(f"{name}: {self.get_node(name)}")
+        print("\nGraph edges:")
+        for e in np.flatnonzero(np.frombuffer(self.alive, dtype=np.uint8)):
+            data = self._edge_data(e)
+            src, dst = self.names[self.src[e]], self.names[self.dst[e]]
+            print(f"{src} -> {dst}, output_idx: {data['output_idx']}, \
+                    input_idx: {data['input_idx']}")
+
+    def is_directed(self):
+        return True
+
+    def draw(self):
+        view = CGraph()
+        view.graph = self.get_graph()
+        view.draw()
+
+    def validate(self):
+        """Same checks and messages as CGraph.validate, on degree arrays"""
+        out_ptr, out_eids, in_ptr, in_eids = self._freeze()
+        out_deg, in_deg = np.diff(out_ptr), np.diff(in_ptr)
+        for i in self._live():
+            node, node_type = self.names[i], KINDS[self.kind[i]]
+
+            if node_type == "input":
+                unused_arg = self.attrs["value"].get(i) is None and out_deg[i] == 0
+                if out_deg[i] != 1 and not unused_arg:
+                    raise ValueError(f"Input node {node} must have exactly one output.")
+                if in_deg[i] != 0:
+                    raise ValueError(f"Input node {node} should not have any inputs.")
+
+            elif node_type == "output":
+                if in_deg[i] != 1:
+                    raise ValueError(f"Output node {node} must have exactly one input.")
+                if out_deg[i] != 0:
+                    raise ValueError(f"Output node {node} should not have any outputs.")
+
+            elif node_type == "var":
+                if in_deg[i] != 1:
+                    raise ValueError(
+                        f"Variable node {node} must have exactly one input."
+                    )
+                if out_deg[i] != 1:
+                    raise ValueError(
+                        f"Variable node {node} must have exactly one output."
+                    )
+
+            elif node_type == "reservoir":
+                for e in in_eids[in_ptr[i] : in_ptr[i + 1]]:
+                    if self.in_idx[e] == _NONE:
+                        src = self.names[self.src[e]]
+                        raise ValueError(
+                            f"Edge from {src} to reservoir {node} missing input index."
+                        )
+                for e in out_eids[out_ptr[i] : out_ptr[i + 1]]:
+                    if self.out_idx[e] == _NONE:
+                        dst = self.names[self.dst[e]]
+                        raise ValueError(
+                            f"Edge from reservoir {node} to {dst} missing output index."
+                        )
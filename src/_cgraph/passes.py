@@ -0,0 +1,167 @@
+""" Graph passes over a CGraph, run before validation and resolution """
+
+from _cgraph.cgraph import CGraph
+
+
+def live_nodes(graph: CGraph) -> set[str]:
+    """Nodes from which a return or output node is reachable"""
+    roots = graph.nodes_of_type("return") + graph.nodes_of_type("output")
+    live, stack = set(roots), list(roots)
+    while stack:
+        node = stack.pop()
+        for src, _ in graph.in_edges(node):
+            if src not in live:
+                live.add(src)
+                stack.append(src)
+    return live
+
+
+def eliminate_dead(graph: CGraph) -> list[str]:
+    """
+    Removes every node that cannot reach a return/output node: dead reservoirs
+    and the vars and constant inputs around them. Function arguments (inputs
+    without a value) are kept, as they fix the signature. Live reservoirs whose
+    readouts lost all their targets get them in node["unused_outputs"], so the
+    resolver drops those rows. Graphs without any return/output node are left
+    untouched. Returns the removed node names.
+    """
+    if not graph.nodes_of_type("return") and not graph.nodes_of_type("output"):
+        return []
+    live = live_nodes(graph)
+
+    dead = []
+    for node in list(graph.all_nodes()):
+        data = graph.get_node(node)
+        if node in live or (data["type"] == "input" and data.get("value") is None):
+            continue
+        dead.append(node)
+    dead_set = set(dead)
+
+    for node in graph.nodes_of_type("reservoir"):
+        if node in dead_set:
+            continue
+        ports: dict[int, bool] = {}
+        for dst, data in graph.out_edges(node):
+            i = data["output_idx"]
+            ports[i] = ports.get(i, False) or dst not in dead_set
+        unused = {i for i, used in ports.items() if not used}
+        if unused:
+            data = graph.get_node(node)
+            data["unused_outputs"] = set(data.get("unused_outputs", ())) | unused
+
+    for node in dead:
+        graph.remove_node(node)
+    return dead
+
+
+def strongly_connected(graph: CGraph) -> list[list[str]]:
+    """Tarjan's SCCs, iteratively; sink components come first"""
+    index, low, on_stack = {}, {}, set()
+    stack, sccs = [], []
+    for root in graph.all_nodes():
+        if root in index:
+            continue
+        work = [(root, iter([dst for dst, _ in graph.out_edges(root)]))]
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, succs = work[-1]
+            advanced = False
+            for dst in succs:
+                if dst not in index:
+                    index[dst] = low[dst] = len(index)
+                    stack.append(dst)
+                    on_stack.add(dst)
+                    work.append((dst, iter([d for d, _ in graph.out_edges(dst)])))
+                    advanced = True
+                    break
+                if dst in on_stack:
+                    low[node] = min(low[node], index[dst])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                scc = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    scc.append(member)
+                    if member == node:
+                        break
+                sccs.append(scc)
+    return sccs
+
+
+def _source_key(graph: CGraph, src: str, canon: dict[str, str]) -> tuple:
+    """What a reservoir input is driven by, with merged reservoirs canonicalized"""
+    data = graph.get_node(src)
+    if data["type"] == "input":
+        value = data.get("value")
+        return ("input", src) if value is None else ("const", value)
+    preds = graph.in_edges(src)
+    if data["type"] == "var" and len(preds) == 1:
+        pred, edge = preds[0]
+        if graph.get_node(pred)["type"] == "reservoir":
+            return ("readout", canon.get(pred, pred), edge["output_idx"])
+    return ("node", src)
+
+
+def eliminate_common(graph: CGraph, fn_of=None) -> dict[str, str]:
+    """
+    Hash-conses reservoir nodes on (function, driving source per input index),
+    upstream first, so duplicate calls collapse into one node whose readouts
+    fan out to all of the duplicates' targets. fn_of(node) names a node's
+    function; by default nodes match only if they share one Reservoir object.
+    Skipped, as merging could change behavior:
+    * nodes on a cycle (recurrent state depends on the loop, not just the inputs)
+    * nodes without inputs (autonomous dynamics, e.g. oscillators)
+    Vars and constant inputs left without a target are removed.
+    Returns merged node -> kept node.
+    """
+    if fn_of is None:
+
+        def fn_of(node: str):
+            res = graph.get_node(node).get("reservoir")
+            return node if res is None else id(res)
+
+    sccs = strongly_connected(graph)
+    cyclic = {node for scc in sccs if len(scc) > 1 for node in scc}
+    cyclic |= {
+        node
+        for node in graph.all_nodes()
+        if any(dst == node for dst, _ in graph.out_edges(node))
+    }
+
+    canon: dict[str, str] = {}
+    table: dict[tuple, str] = {}
+    for scc in reversed(sccs):
+        for node in scc:
+            if graph.get_node(node)["type"] != "reservoir" or node in cyclic:
+                continue
+            ins = graph.in_edges(node)
+            if not ins:
+                continue
+            sources = sorted(
+                (data["input_idx"], _source_key(graph, src, canon)) for src, data in ins
+            )
+            rep = table.setdefault((fn_of(node), tuple(sources)), node)
+            if rep != node:
+                canon[node] = rep
+
+    for dup, rep in canon.items():
+        feeders = [src for src, _ in graph.in_edges(dup)]
+        for dst, data in graph.out_edges(dup):
+            graph.add_edge(
+                rep, dst, out_idx=data["output_idx"], in_idx=data["input_idx"]
+            )
+        graph.remove_node(dup)
+        for src in feeders:
+            data = graph.get_node(src)
+            unused = not graph.out_edges(src)
+            if unused and (data["type"] == "var" or data.get("value") is not None):
+                graph.remove_node(src)
+    return canon
@@ -3,6 +3,8 @@ import re
 import time
 from typing import List, Tuple, NewType
 from _cgraph.cgraph import CGraph
+from _cgraph.compact import CompactCGraph
+from _cgraph.passes import eliminate_common, eliminate_dead
 from _prnn.reservoir import Reservoir
 from _cgraph.resolve import Resolver
 from _std.std import registry
@@ -13,18 +15,29 @@ cvec = NewType("cvec", List[Union[float, str, None]])
 
 
 class FnInfo:
-    def __init__(self):
+    def __init__(self, graph_cls=CGraph):
         self.res: Reservoir = None
         self.out_dim: int = None
         self.inp_dim: int = None
         self.inputs: List[str] = []
         self.outputs: List[str] = []
         self.vars: set = set()
-        self.graph = CGraph()
+        self.graph: CGraph = graph_cls()
+        self.resolver: Resolver = None
 
 
 class ASTCompiler(ast.NodeVisitor):
-    def __init__(self, verbose=False, track_time=False, file=None):
+    def __init__(
+        self,
+        verbose=False,
+        track_time=False,
+        file=None,
+        sparse=False,
+        flatten=False,
+        compact=False,
+        prune=True,
+        cse=True,
+    ):
         self.uid_ct = 0
         self.file = file
         self.funcs: dict[str, FnInfo] = {}
@@ -32,6 +45,20 @@ class ASTCompiler(ast.NodeVisitor):
         self.verbose: bool = verbose
         self.track_time = track_time
         self.time_data = {}
+        # resolve composites with scipy.sparse A (see Resolver)
+        self.sparse = sparse
+        # inline every user function call and resolve one graph of presets
+        self.flatten = flatten
+        # array-backed graphs instead of networkx (see CompactCGraph)
+        self.graph_cls = CompactCGraph if compact else CGraph
+        # drop reservoirs that never reach a return before resolving
+        self.prune = prune
+        # collapse duplicate calls on the same inputs into one reservoir
+        self.cse = cse
+        # registry name -> loaded preset, shared by every node that uses it
+        self.presets: dict[str, Reservoir] = {}
+        # function name -> ast.dump of its definition, as last compiled
+        self.sources: dict[str, str] = {}
         # Per function
         self.curr_fn: str = None
 
@@ -40,6 +67,7 @@ class ASTCompiler(ast.NodeVisitor):
         Returns None on failure.
         """
         self.head = prog_ast
+        self.sources = self._fn_sources(prog_ast)
 
         if self.verbose:
             print(ast.dump(prog_ast, indent=4))
@@ -55,6 +83,7 @@ class ASTCompiler(ast.NodeVisitor):
             self._end_timer("traverse ast")
 
         for fn in self.funcs:
+            self._prune(self.funcs[fn].graph, fn)
             self.funcs[fn].graph.validate()
 
         # print graphs
@@ -65,9 +94,126 @@ class ASTCompiler(ast.NodeVisitor):
                 graph.draw()
                 graph.print()
 
+        if self.flatten:
+            return self._compile_flat()
+
         if self.track_time:
             self._start_timer("global resolution loop")
 
+        self._resolve_pending()
+
+        if self.track_time:
+            self._end_timer("global resolution loop")
+
+        if "main" not in self.funcs:
+            self.throw(None, "Couldn't find 'main' function")
+
+        res = self.funcs["main"].res
+        assert res is not None, "compile: failed to compile reservoir"
+        return res
+
+    def recompile(self, prog_ast: ast.Module) -> Reservoir:
+        """
+        Compiles an edited version of the last compiled program. Only functions
+        whose definitions changed are re-visited and re-resolved; each caller's
+        composite then has just those calls' blocks patched (Resolver.patch),
+        innermost callers first. Falls back to compile() before a first compile,
+        in flatten mode, when main or the set of functions changed, or when a
+        changed function's argument or return count did (callers were built
+        for the old signature).
+        """
+        old, new = self.sources, self._fn_sources(prog_ast)
+        changed = {fn for fn in self.funcs if old.get(fn) != new.get(fn)}
+        if not self.funcs or self.flatten or set(old) != set(new) or "main" in changed:
+            self.funcs = {}
+            return self.compile(prog_ast)
+
+        self.head = prog_ast
+        self.sources = new
+        if self.track_time:
+            self._start_timer("recompile")
+
+        def signature(fn: str) -> tuple[int, int]:
+            return self.funcs[fn].inp_dim, len(self.funcs[fn].outputs)
+
+        old_signatures = {fn: signature(fn) for fn in changed}
+        for fn in changed:
+            del self.funcs[fn]
+        for fn in sorted(changed):
+            if fn not in self.funcs:  # may already be compiled as a callee
+                self.visit_FunctionDef(self._get_fn_node(fn))
+        if any(signature(fn) != old_signatures[fn] for fn in changed):
+            if self.track_time:
+                self._end_timer("recompile")
+            self.funcs = {}
+            return self.compile(prog_ast)
+        # every rebuilt function, including callees visited from a caller
+        for fn in sorted(changed):
+            self._prune(self.funcs[fn].graph, fn)
+            self.funcs[fn].graph.validate()
+        self._resolve_pending()
+
+        # callers (transitively) of a changed function, patched callees first
+        stale = set(changed)
+        grown = True
+        while grown:
+            before = len(stale)
+            stale |= {
+                fn for fn in self.funcs if set(self._user_calls(fn).values()) & stale
+            }
+            grown = len(stale) > before
+        pending = stale - changed
+        while pending:
+            for fn in list(pending):
+                calls = self._user_calls(fn)
+                if set(calls.values()) & pending:
+                    continue
+                updates = {
+                    node: self.funcs[callee].res
+                    for node, callee in calls.items()
+                    if callee in stale
+                }
+                info = self.funcs[fn]
+                info.res = info.resolver.patch(updates)
+                pending.discard(fn)
+
+        if self.track_time:
+            self._end_timer("recompile")
+        return self.funcs["main"].res
+
+    def _prune(self, graph: CGraph, fn: str):
+        if self.cse:
+            # calls match by function name; flattened nodes carry a caller path
+            merged = eliminate_common(
+                graph, lambda node: self.strip_uid(node.split("/")[-1])
+            )
+            if self.verbose and merged:
+                print(f"{fn}: merged duplicate calls {merged}")
+        if not self.prune:
+            return
+        dead = eliminate_dead(graph)
+        if self.verbose and dead:
+            print(f"{fn}: eliminated dead nodes {dead}")
+
+    def _user_calls(self, fn: str) -> dict[str, str]:
+        """Reservoir nodes of fn's graph that call user functions -> callee name"""
+        calls = {}
+        for node in self.funcs[fn].graph.nodes_of_type("reservoir"):
+            name = self.strip_uid(node)
+            if name not in registry and name in self.funcs:
+                calls[node] = name
+        return calls
+
+    @staticmethod
+    def _fn_sources(prog_ast: ast.Module) -> dict[str, str]:
+        return {
+            node.name: ast.dump(node)
+            for node in prog_ast.body
+            if isinstance(node, ast.FunctionDef)
+        }
+
+    def _resolve_pending(self):
+        """Resolves every function without a reservoir yet, callees first"""
         # resolve every function's cgraph to a reservoir
         made_resolution = True
         while made_resolution:
@@ -92,20 +238,7 @@ class ASTCompiler(ast.NodeVisitor):
                             if self.verbose:
                                 print(f"res loop: found {fn_name} in registry")
 
-                            node["reservoir"] = Reservoir.load(registry[fn_name].path)
-                            res = node["reservoir"]
-                            res: Reservoir
-
-                            # give placeholder names if none
-                            if res.name == []:
-                                res.name = fn_name
-                            if res.output_names == []:
-                                for i in range(res.W.shape[0]):
-                                    res.output_names.append(f"{fn_name}_o{i}")
-                            if res.input_names == []:
-                                for i in range(res.x_init.shape[0]):
-                                    res.input_names.append(f"{fn_name}_o{i}")
-
+                            node["reservoir"] = self._load_preset(fn_name)
                             made_resolution = True
                         # check in program defined fns
                         elif fn_name in self.funcs.keys():
@@ -113,7 +246,8 @@ class ASTCompiler(ast.NodeVisitor):
                                 print(f"res loop: found {fn_name} in compiled fns")
                             res = self.funcs[fn_name].res
                             if res is not None:
-                                node["reservoir"] = res.copy()  # to avoid overwrites
+                                # resolution never mutates constituents: share it
+                                node["reservoir"] = res
                                 made_resolution = True
                             else:
                                 unresolved_res_ct += 1
@@ -127,7 +261,16 @@ class ASTCompiler(ast.NodeVisitor):
                     if self.track_time:
                         self._start_timer(f"resolve {fn}")
 
-                    self.funcs[fn].res = Resolver(self.funcs[fn].graph).resolve()
+                    info = self.funcs[fn]
+                    # columns and rows follow the signature, so callers can
+                    # wire arguments and returns by position
+                    self.funcs[fn].resolver = Resolver(
+                        info.graph,
+                        sparse=self.sparse,
+                        inputs=info.inputs[: info.inp_dim],
+                        outputs=info.outputs,
+                    )
+                    self.funcs[fn].res = self.funcs[fn].resolver.resolve()
 
                     # if self.verbose:
                     #     print(f"reservoir resolved: {fn}")
@@ -141,20 +284,108 @@ class ASTCompiler(ast.NodeVisitor):
                         print(f"Solved fn {fn} inputs: ", self.funcs[fn].inputs)
                         print(f"Solved fn {fn} outputs: ", self.funcs[fn].outputs)
 
-                    self.funcs[fn].res.input_names = self.funcs[fn].inputs
-                    self.funcs[fn].res.output_names = self.funcs[fn].outputs
                     made_resolution = True
 
-        if self.track_time:
-            self._end_timer("global resolution loop")
-
+    def _compile_flat(self) -> Reservoir:
+        """Resolves main's fully inlined graph once, ordered like main's signature"""
         if "main" not in self.funcs:
             self.throw(None, "Couldn't find 'main' function")
+        if self.track_time:
+            self._start_timer("flatten")
+        flat = self.graph_cls()
+        self._inline("main", flat, prefix="")
+        self._prune(flat, "flattened main")
+        if self.track_time:
+            self._end_timer("flatten")
+            self._start_timer("resolve flattened main")
 
-        res = self.funcs["main"].res
-        assert res is not None, "compile: failed to compile reservoir"
+        fn = self.funcs["main"]
+        res = Resolver(
+            flat,
+            sparse=self.sparse,
+            inputs=fn.inputs[: fn.inp_dim],
+            outputs=fn.outputs,
+        ).resolve()
+
+        if self.track_time:
+            self._end_timer("resolve flattened main")
+        fn.res = res
         return res
 
+    def _inline(
+        self, fn: str, flat: CGraph, prefix: str
+    ) -> tuple[dict[int, list[tuple[str, int]]], dict[int, tuple[str, int]]]:
+        """
+        Emits fn's graph into flat with node names prefixed, replacing calls to
+        user functions by their own inlined graphs. For a nested call (prefix
+        set) the arguments and returns are spliced out; returns, per argument
+        index, the (preset node, input_idx) ports it feeds, and per return
+        index the (preset node, output_idx) port producing it.
+        """
+        info = self.funcs[fn]
+        graph = info.graph
+        nested = prefix != ""
+        args = info.inputs[: info.inp_dim] if nested else []
+
+        calls = {}
+        for node in graph.all_nodes():
+            data = graph.get_node(node)
+            fn_name = self.strip_uid(node)
+            if data["type"] == "reservoir":
+                if fn_name in registry:
+                    flat.add_reservoir(prefix + node, self._load_preset(fn_name))
+                    if "unused_outputs" in data:
+                        unused = data["unused_outputs"]
+                        flat.get_node(prefix + node)["unused_outputs"] = unused
+                elif fn_name in self.funcs:
+                    calls[node] = self._inline(fn_name, flat, f"{prefix}{node}/")
+                else:
+                    self.throw(None, f"Called undefined function {fn_name}")
+            elif node in args or (nested and data["type"] == "output"):
+                continue
+            elif data["type"] == "input":
+                flat.add_input(prefix + node, val=data["value"])
+            elif nested and data["type"] == "return":
+                flat.add_var(prefix + node)
+            else:
+                flat.add_node(prefix + node, data["type"])
+
+        def sinks(node: str, idx: int) -> list[tuple[str, int]]:
+            if node in calls:
+                return calls[node][0].get(idx, [])
+            return [(prefix + node, idx)]
+
+        def source(node: str, idx: int) -> tuple[str, int]:
+            if node in calls:
+                if idx not in calls[node][1]:
+                    self.throw(
+                        None, f"{self.strip_uid(node)}: cannot inline returned argument"
+                    )
+                return calls[node][1][idx]
+            return prefix + node, idx
+
+        arg_ports: dict[int, list[tuple[str, int]]] = {}
+        edges = [
+            (u, v, data) for u in graph.all_nodes() for v, data in graph.out_edges(u)
+        ]
+        for u, v, data in edges:
+            if u in args:
+                arg_ports.setdefault(args.index(u), []).extend(
+                    sinks(v, data["input_idx"])
+                )
+                continue
+            src, out_idx = source(u, data["output_idx"])
+            for dst, in_idx in sinks(v, data["input_idx"]):
+                flat.add_edge(src, dst, out_idx=out_idx, in_idx=in_idx)
+
+        ret_ports: dict[int, tuple[str, int]] = {}
+        if nested:
+            for i, name in enumerate(info.outputs):
+                preds = graph.in_edges(name)
+                if len(preds) == 1 and preds[0][0] not in args:
+                    ret_ports[i] = source(preds[0][0], preds[0][1]["output_idx"])
+        return arg_ports, ret_ports
+
     def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
         # get name
         fn_name = node.name
@@ -163,7 +394,8 @@ class ASTCompiler(ast.NodeVisitor):
             print(f"Visiting function definition: {fn_name}")
 
         # create entry in funcs
-        fn_info = FnInfo()
+        fn_info = FnInfo(self.graph_cls)
+        fn_info.inp_dim = len(node.args.args)
         self.funcs[fn_name] = fn_info
 
         # process args
@@ -407,6 +639,21 @@ class ASTCompiler(ast.NodeVisitor):
     def strip_uid(self, name_w_uid: str) -> str:
         return re.sub(r"_\d+$", "", name_w_uid)
 
+    def _load_preset(self, fn_name: str) -> Reservoir:
+        """Loads a registry preset once per compiler, giving placeholder names if none"""
+        if fn_name not in self.presets:
+            res = Reservoir.load(registry[fn_name].path)
+            if res.name == []:
+                res.name = fn_name
+            if res.output_names == []:
+                res.output_names = [f"{fn_name}_o{i}" for i in range(res.W.shape[0])]
+            if res.input_names == []:
+                res.input_names = [
+                    f"{fn_name}_o{i}" for i in range(res.x_init.shape[0])
+                ]
+            self.presets[fn_name] = res
+        return self.presets[fn_name]
+
     def _start_timer(self, key: str):
         """Start timer for a given key."""
         if self.track_time:
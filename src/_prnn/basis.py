@@ -0,0 +1,335 @@
+"""
+Closed-form dynamical representational basis (DNP) for tanh reservoirs.
+
+The i-th derivative of r(x) = tanh(B x + d) at x0 is
+    P_i(tanh(B x0 + d)) * B[:, j1] * ... * B[:, ji]
+where P_i is a polynomial in t = tanh(z) (P_0 = t, P_{i+1} = P_i'(t) (1 - t^2)),
+cf. matlab_dependencies/tanh_deriv.m and gen_basis.m.
+"""
+
+import os
+import math
+import itertools
+from collections import OrderedDict
+import numpy as np
+from numpy.polynomial import polynomial as P
+from _prnn import lstsq
+
+
+def tanh_deriv_polys(order: int) -> list[np.ndarray]:
+    """Ascending coefficients (in t = tanh z) of d^i/dz^i tanh(z) for i = 0..order"""
+    polys = [np.array([0.0, 1.0])]
+    one_minus_t2 = np.array([1.0, 0.0, -1.0])
+    for _ in range(order):
+        polys.append(P.polymul(P.polyder(polys[-1]), one_minus_t2))
+    return polys
+
+
+def tanh_derivs(t: np.ndarray, order: int) -> np.ndarray:
+    """len(t) x (order + 1) matrix of tanh derivatives evaluated where tanh(z) = t"""
+    return np.stack([P.polyval(t, c) for c in tanh_deriv_polys(order)], axis=1)
+
+
+def dnp_basis(B: np.ndarray, d: np.ndarray, x0: np.ndarray, eq_pow: int) -> np.ndarray:
+    """
+    latent x sum_i(k^i) basis of the derivatives of tanh(B x + d) at x0, orders 0..eq_pow.
+    Column order matches jnp.reshape(jacfwd^i(f)(x0), [latent, k^i], "F").
+    """
+    B = np.asarray(B, dtype=float)
+    t = np.tanh(B @ np.asarray(x0, dtype=float).ravel() + np.asarray(d).ravel())
+    D = tanh_derivs(t, eq_pow)
+
+    cols = [D[:, :1]]
+    prod = np.ones((B.shape[0], 1))
+    for i in range(1, eq_pow + 1):
+        # F order: the earliest derivative index varies fastest
+        prod = (B[:, :, np.newaxis] * prod[:, np.newaxis, :]).reshape(B.shape[0], -1)
+        cols.append(D[:, i : i + 1] * prod)
+    return np.concatenate(cols, axis=1)
+
+
+def monomials(k: int, eq_pow: int) -> list[np.ndarray]:
+    """
+    For each order i = 0..eq_pow, the multisets of input indices as an
+    n_i x k matrix of exponent vectors (one row per unique monomial).
+    """
+    out = []
+    for i in range(eq_pow + 1):
+        combos = list(itertools.combinations_with_replacement(range(k), i))
+        alpha = np.zeros((len(combos), k), dtype=int)
+        for row, combo in enumerate(combos):
+            for j in combo:
+                alpha[row, j] += 1
+        out.append(alpha)
+    return out
+
+
+def multinomial_weights(alpha: np.ndarray) -> np.ndarray:
+    """Number of index permutations i! / prod(alpha_j!) of each monomial (row of alpha)"""
+    fact = np.vectorize(math.factorial)
+    return fact(alpha.sum(axis=1)) / np.prod(fact(alpha), axis=1)
+
+
+def full_index(alpha: np.ndarray) -> np.ndarray:
+    """F-order column (within its order) of one representative of each monomial"""
+    k = alpha.shape[1]
+    idx = np.zeros(alpha.shape[0], dtype=int)
+    for row, a in enumerate(alpha):
+        js = np.repeat(np.arange(k), a)
+        idx[row] = np.sum(js * k ** np.arange(len(js)))
+    return idx
+
+
+def sym_dnp_basis(
+    B: np.ndarray, d: np.ndarray, x0: np.ndarray, eq_pow: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Symmetric-tensor compressed DNP: one column per unique monomial instead of
+    one per index permutation. Returns (basis, weights, cols), where weights are
+    the multinomial multiplicities and cols the matching columns of dnp_basis.
+    Scaling both sides of the least-squares system by sqrt(weights) gives the
+    same minimiser as the full permutation-expanded system.
+    """
+    B = np.asarray(B, dtype=float)
+    t = np.tanh(B @ np.asarray(x0, dtype=float).ravel() + np.asarray(d).ravel())
+    D = tanh_derivs(t, eq_pow)
+
+    cols, weights, full_cols = [], [], []
+    offset = 0
+    for i, alpha in enumerate(monomials(B.shape[1], eq_pow)):
+        prod = np.ones((B.shape[0], alpha.shape[0]))
+        for j in range(B.shape[1]):
+            prod *= B[:, j : j + 1] ** alpha[:, j]
+        cols.append(D[:, i : i + 1] * prod)
+        weights.append(multinomial_weights(alpha))
+        full_cols.append(offset + full_index(alpha))
+        offset += B.shape[1] ** i
+    return (
+        np.concatenate(cols, axis=1),
+        np.concatenate(weights),
+        np.concatenate(full_cols),
+    )
+
+
+def poly_output_matrix(polys: list, k: int, eq_pow: int) -> np.ndarray:
+    """
+    O over unique monomials (sym_dnp_basis column order), read straight from
+    polynomial coefficients: the Taylor derivative at 0 of c * x^alpha is alpha! * c.
+    polys: one (coeffs, exps) pair per output, exps being a terms x k exponent matrix.
+    """
+    mons = np.concatenate(monomials(k, eq_pow))
+    index = {tuple(a): i for i, a in enumerate(mons)}
+    fact = np.vectorize(math.factorial, otypes=[float])
+
+    O = np.zeros((len(polys), len(mons)))
+    for row, (coeffs, exps) in enumerate(polys):
+        exps = np.asarray(exps, dtype=int).reshape(-1, k)
+        for c, alpha in zip(np.asarray(coeffs, dtype=float).ravel(), exps):
+            col = index.get(tuple(alpha))
+            if col is None:
+                raise ValueError(
+                    f"monomial exponent {tuple(alpha)} exceeds basis order {eq_pow}"
+                )
+            O[row, col] += c * np.prod(fact(alpha))
+    return O
+
+
+def expand_symmetric(O: np.ndarray, k: int, eq_pow: int) -> np.ndarray:
+    """Inverse of the compression: one column per index permutation, in F order"""
+    mons = monomials(k, eq_pow)
+    index = {tuple(a): i for i, a in enumerate(np.concatenate(mons))}
+    cols = []
+    for i in range(eq_pow + 1):
+        for js in itertools.product(range(k), repeat=i):
+            # product() varies the last index fastest; F order wants the first
+            cols.append(index[tuple(np.bincount(np.array(js, dtype=int), minlength=k))])
+    return O[:, cols]
+
+
+class Basis:
+    """
+    Equation-independent half of gen_baseRNN: random B, r0, d, the (weighted)
+    DNP they induce and its thin SVD, so any right-hand side O can be solved
+    without refactoring.
+    """
+
+    def __init__(self, B, r0, d, x0, dnp, weights=None, sym_cols=None):
+        self.B: np.ndarray = B
+        self.r0: np.ndarray = r0
+        self.d: np.ndarray = d
+        self.x0: np.ndarray = x0
+        self.weights: np.ndarray = weights
+        self.sym_cols: np.ndarray = sym_cols
+
+        scale = np.sqrt(weights) if weights is not None else 1.0
+        self.dnp: np.ndarray = dnp * scale
+        self.U: np.ndarray = None
+        self.s: np.ndarray = None
+        self.Vt: np.ndarray = None
+
+    def factor(self) -> "Basis":
+        """Thin SVD of the (weighted) DNP, computed once on first use"""
+        if self.s is None:
+            self.U, self.s, self.Vt = np.linalg.svd(self.dnp.T, full_matrices=False)
+        return self
+
+    @property
+    def latent_dim(self) -> int:
+        return self.B.shape[0]
+
+    def prepare(self, O: np.ndarray, compressed=False) -> np.ndarray:
+        """
+        Selects and weights the columns of a full (F-order) O to match the basis.
+        compressed: O already has one column per unique monomial.
+        """
+        O = np.asarray(O)
+        if self.sym_cols is None:
+            return O
+        if not compressed:
+            O = O[:, self.sym_cols]
+        return O * np.sqrt(self.weights)
+
+    def solve(self, O: np.ndarray, rcond: float = None) -> np.ndarray:
+        """
+        Minimum-norm W with W @ dnp ~= O (O already prepared), via the cached SVD.
+        Singular values below rcond * s_max are dropped, as in jnp.linalg.lstsq.
+        """
+        self.factor()
+        if rcond is None:
+            rcond = np.finfo(self.s.dtype).eps * max(self.dnp.shape)
+        keep = self.s > rcond * self.s[0]
+        inv = np.where(keep, 1 / np.where(keep, self.s, 1), 0)
+        return ((self.Vt.T * inv) @ (self.U.T @ O.T)).T
+
+    def lstsq(self, O: np.ndarray, solver="svd", **options):
+        """
+        Like solve, but with any backend of _prnn.lstsq ("svd" reuses the cached
+        factorization). Returns (W, SolveReport).
+        """
+        if solver != "svd":
+            return lstsq.solve(self.dnp, O, solver, **options)
+        W = self.solve(O, options.get("rcond"))
+        report = lstsq.SolveReport(solver)
+        report.residual = lstsq.relative_residual(W, self.dnp, O)
+        report.cond = lstsq.cond_estimate(self.s, options.get("rcond"), self.dnp.shape)
+        return W, report
+
+    def to_dict(self) -> dict:
+        out = dict(B=self.B, r0=self.r0, d=self.d, x0=self.x0, dnp=self.dnp)
+        if self.s is not None:
+            out.update(U=self.U, s=self.s, Vt=self.Vt)
+        if self.weights is not None:
+            out.update(weights=self.weights, sym_cols=self.sym_cols)
+        return out
+
+    @classmethod
+    def from_dict(cls, data) -> "Basis":
+        basis = cls.__new__(cls)
+        basis.B, basis.r0, basis.d, basis.x0 = (
+            data["B"],
+            data["r0"],
+            data["d"],
+            data["x0"],
+        )
+        basis.dnp = data["dnp"]
+        basis.U, basis.s, basis.Vt = (
+            (data["U"], data["s"], data["Vt"]) if "s" in data else (None, None, None)
+        )
+        basis.weights = data["weights"] if "weights" in data else None
+        basis.sym_cols = data["sym_cols"] if "sym_cols" in data else None
+        return basis
+
+
+def build_basis(
+    num_inputs: int,
+    eq_pow: int,
+    latent_dim: int,
+    seed: int = 0,
+    symmetric=True,
+    factor=True,
+) -> Basis:
+    """
+    Draws B and r0 exactly as gen_baseRNN always has and (if factor) takes the
+    SVD of the resulting DNP
+    """
+    import jax
+
+    rnga, _ = jax.random.split(jax.random.PRNGKey(seed), 2)
+    x0 = np.zeros(num_inputs)
+    B = np.array((jax.random.uniform(rnga, (latent_dim, num_inputs)) - 0.5) / 50)
+    r0 = np.array(jax.random.uniform(rnga, (latent_dim, 1)) - 0.5)
+    d = np.squeeze(np.arctanh(r0), axis=1) - (B @ x0)
+
+    if symmetric:
+        dnp, weights, sym_cols = sym_dnp_basis(B, d, x0, eq_pow)
+        basis = Basis(B, r0, d, x0, dnp, weights, sym_cols)
+    else:
+        basis = Basis(B, r0, d, x0, dnp_basis(B, d, x0, eq_pow))
+    return basis.factor() if factor else basis
+
+
+class BasisCache:
+    """
+    Factored bases keyed by (num_inputs, eq_pow, latent_dim, seed, symmetric).
+    Keeps the most recent `maxsize` in memory and, if a directory is set,
+    also stores them as .npz files so later processes skip the factorization.
+    """
+
+    VERSION = 1
+
+    def __init__(self, directory: str = None, maxsize: int = 16):
+        self.directory = directory
+        self.maxsize = maxsize
+        self._mem: OrderedDict[str, Basis] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, num_inputs, eq_pow, latent_dim, seed, symmetric) -> str:
+        kind = "sym" if symmetric else "full"
+        return f"v{self.VERSION}_k{num_inputs}_p{eq_pow}_n{latent_dim}_s{seed}_{kind}"
+
+    def get(
+        self,
+        num_inputs: int,
+        eq_pow: int,
+        latent_dim: int,
+        seed=0,
+        symmetric=True,
+        factor=True,
+    ) -> Basis:
+        """Cached basis; factor=False skips the SVD for bases only used by other solvers"""
+        key = self.key(num_inputs, eq_pow, latent_dim, seed, symmetric)
+        path = os.path.join(self.directory, f"{key}.npz") if self.directory else None
+        if key in self._mem:
+            basis = self._mem[key]
+            self.hits += 1
+        elif path and os.path.isfile(path):
+            with np.load(path) as data:
+                basis = Basis.from_dict(data)
+            self.hits += 1
+        else:
+            basis = build_basis(num_inputs, eq_pow, latent_dim, seed, symmetric, factor)
+            self.misses += 1
+            self._store(path, basis)
+
+        if factor and basis.s is None:
+            # first stored for a solver without the SVD: persist it once taken
+            self._store(path, basis.factor())
+
+        self._mem[key] = basis
+        self._mem.move_to_end(key)
+        if len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+        return basis
+
+    def _store(self, path: str, basis: Basis):
+        if path:
+            os.makedirs(self.directory, exist_ok=True)
+            np.savez(path, **basis.to_dict())
+
+    def clear(self):
+        self._mem.clear()
+
+
+# shared by every gen_baseRNN call unless another cache is passed
+basis_cache = BasisCache(directory=os.environ.get("PYRES_BASIS_CACHE"))
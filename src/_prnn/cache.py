@@ -0,0 +1,58 @@
+"""
+Persistent, content-addressed cache of Reservoir.solve results. Entries are
+pickled reservoirs named by a sha256 over the canonical form of the equations,
+every solve parameter that affects the result and SOLVER_REVISION.
+"""
+
+import os
+import hashlib
+import pickle as pkl
+import tempfile
+import numpy as np
+import sympy as sp
+
+ENV_VAR = "PYRES_SOLVE_CACHE"
+# bump whenever solve() can return a different reservoir for the same key
+# (solver, basis, O or feedback-fold changes), so stale entries are not served
+SOLVER_REVISION = 4
+
+
+def cache_dir(directory: str = None) -> str:
+    """Explicit directory, else $PYRES_SOLVE_CACHE, else None (caching off)"""
+    return directory if directory is not None else os.environ.get(ENV_VAR)
+
+
+def solve_key(
+    eqs: list[tuple[sp.Symbol, sp.Expr]], ic: np.ndarray = None, **params
+) -> str:
+    """Canonical hash of ordered (lhs, rhs) pairs, the initial condition and solve params"""
+    h = hashlib.sha256()
+    h.update(f"solver={SOLVER_REVISION};sympy={sp.__version__};".encode())
+    for lhs, rhs in eqs:
+        h.update(f"{sp.srepr(sp.sympify(lhs))}={sp.srepr(sp.sympify(rhs))};".encode())
+    for name in sorted(params):
+        h.update(f"{name}={params[name]!r};".encode())
+    if ic is not None:
+        ic = np.ascontiguousarray(ic, dtype=np.float64)
+        h.update(str(ic.shape).encode() + ic.tobytes())
+    return h.hexdigest()
+
+
+def load(directory: str, key: str):
+    """Cached reservoir for key, or None"""
+    filepath = os.path.join(directory, f"{key}.rsvr")
+    if not os.path.isfile(filepath):
+        return None
+    with open(filepath, "rb") as f:
+        return pkl.load(f)
+
+
+def store(directory: str, key: str, res) -> str:
+    """Pickles res under key; written to a temp file first so readers never see partial entries"""
+    os.makedirs(directory, exist_ok=True)
+    filepath = os.path.join(directory, f"{key}.rsvr")
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pkl.dump(res, f)
+    os.replace(tmp, filepath)
+    return filepath
@@ -1,7 +1,7 @@
 """ Circuit class and methods """
 
 import numpy as np
-from _prnn.reservoir import Reservoir
+from _prnn.reservoir import Reservoir, _dense, _is_zero
 
 
 class Circuit:
@@ -69,6 +69,56 @@ class Circuit:
         """
         return Reservoir(a, b, r_init, x_init, 0.001, 100, d, w)
 
+    def stack(self) -> Reservoir:
+        """
+        Block-diagonal composite of self.reservoirs with no connections between
+        them: inputs, outputs and their names are concatenated in order.
+        Void-input reservoirs contribute no input columns. Sparse constituents
+        are densified block by block.
+        """
+        a, idxs = self._build_adj()
+        dim = a.shape[0]
+
+        bs, xs, input_names = [], [], []
+        for res in self.reservoirs:
+            if res.x_init.shape[0] == 1 and _is_zero(res.B):
+                continue
+            bs.append((res, _dense(res.B)))
+            xs.append(res.x_init)
+            input_names += list(res.input_names)
+
+        b = np.zeros((dim, sum(blk.shape[1] for _, blk in bs)))
+        col = 0
+        for res, blk in bs:
+            b[idxs[res] : idxs[res] + blk.shape[0], col : col + blk.shape[1]] = blk
+            col += blk.shape[1]
+        x_init = np.vstack(xs) if xs else np.zeros((1, 1))
+        if not bs:
+            b = np.zeros((dim, 1))
+
+        w = np.zeros((sum(res.W.shape[0] for res in self.reservoirs), dim))
+        row = 0
+        for res in self.reservoirs:
+            w[row : row + res.W.shape[0], idxs[res] : idxs[res] + res.A.shape[0]] = (
+                _dense(res.W)
+            )
+            row += res.W.shape[0]
+
+        first = next(iter(self.reservoirs))
+        return Reservoir(
+            a,
+            b,
+            np.vstack([res.r_init for res in self.reservoirs]),
+            x_init,
+            first.global_timescale,
+            first.gamma,
+            np.vstack([res.d for res in self.reservoirs]),
+            w,
+            input_names=input_names,
+            output_names=[n for res in self.reservoirs for n in res.output_names],
+            r=np.vstack([res.r for res in self.reservoirs]),
+        )
+
     def _build_adj(self):
         """
         Builds the adjacency matrix and tracks reservoir indices.
@@ -85,7 +135,7 @@ class Circuit:
         for r in self.reservoirs:
             sz = r.A.shape[0]
             res_idx[r] = idx
-            adj[idx : idx + sz, idx : idx + sz] = r.A
+            adj[idx : idx + sz, idx : idx + sz] = _dense(r.A)
             idx += sz
 
         return adj, res_idx
@@ -0,0 +1,160 @@
+""" Stochastic (Euler-Maruyama) ensemble simulation of reservoirs """
+
+import numpy as np
+from _prnn.reservoir import Reservoir
+
+NOISE_MODES = ("additive", "multiplicative")
+
+
+class EnsembleStats:
+    """
+    Summary statistics of a noisy ensemble run. Each readout is compared with a
+    noise-free reference trajectory integrated alongside the ensemble; no
+    trajectories are stored.
+    * error_rate: fraction of (trial, step) samples whose sign disagrees with the reference
+    * flip_prob: fraction of trials with at least one disagreement
+    * max_dev: largest |noisy - reference| deviation seen in any trial
+    * final_mean, final_std: readout statistics across trials at the last step
+    """
+
+    def __init__(self, n_trials: int, n_steps: int, output_names: list[str]):
+        self.n_trials = n_trials
+        self.n_steps = n_steps
+        self.output_names = output_names
+        self.error_rate: np.ndarray = None
+        self.flip_prob: np.ndarray = None
+        self.max_dev: np.ndarray = None
+        self.final_mean: np.ndarray = None
+        self.final_std: np.ndarray = None
+        self.reference_final: np.ndarray = None
+
+    def print(self, precision=4):
+        print("--------------------")
+        print(f"Ensemble: {self.n_trials} trials x {self.n_steps} steps")
+        names = self.output_names or [f"o{i}" for i in range(len(self.error_rate))]
+        for i, name in enumerate(names):
+            print(
+                f"{name}: error_rate={self.error_rate[i]:.{precision}f} "
+                f"flip_prob={self.flip_prob[i]:.{precision}f} "
+                f"max_dev={self.max_dev[i]:.{precision}f}"
+            )
+        print("--------------------")
+
+
+def simulate_ensemble(
+    res: Reservoir,
+    inputs: np.ndarray = None,
+    time: int = None,
+    n_trials: int = 100,
+    sigma_r: float = 0.0,
+    sigma_x: float = 0.0,
+    noise: str = "additive",
+    seed: int = 0,
+    W: np.ndarray = None,
+    margin: float = 0.05,
+    settle: int = 0,
+    chunk_size: int = None,
+) -> EnsembleStats:
+    """
+    Integrates dr = gamma * (-r + tanh(A r + B x + d)) dt + sigma_r * g(r) dW with
+    Euler-Maruyama for n_trials independent noise realisations at once.
+    * noise: 'additive' (g = 1) or 'multiplicative' (g = r, and x scaled by x)
+    * sigma_x: std of white noise added to the inputs at every step
+    * margin: samples where |reference| < margin are not scored (transitions)
+    * settle: number of initial steps excluded from scoring
+    Each trial draws its r- and x-noise from two streams of its own, spawned from
+    `seed`, so results do not depend on n_trials or chunk_size.
+    """
+    if noise not in NOISE_MODES:
+        raise ValueError(f"noise must be one of {NOISE_MODES}, got '{noise}'")
+
+    W = W if W is not None else res.W
+    assert (
+        W is not None
+    ), "error: simulate_ensemble: W must be defined, either by argument or in reservoir object"
+
+    if inputs is None:
+        assert (
+            time is not None
+        ), "error: simulate_ensemble: if reservoir has no inputs, 'time' is required"
+        inputs = np.zeros((res.x_init.shape[0], time))
+    else:
+        assert (
+            inputs.shape[0] == res.x_init.shape[0]
+        ), f"input dimension mismatch: passed {inputs.shape[0]} but expected {res.x_init.shape[0]}"
+
+    n = res.A.shape[0]
+    n_steps = inputs.shape[1]
+    dt = res.global_timescale
+    sqrt_dt = np.sqrt(dt)
+    multiplicative = noise == "multiplicative"
+
+    # column 0 is the noise-free reference, columns 1.. are the trials
+    r = np.repeat(res.r.reshape(-1, 1), n_trials + 1, axis=1)
+    # per trial, separate r- and x-noise streams: draws never interleave
+    trials = np.random.SeedSequence(seed).spawn(n_trials)
+    streams_r, streams_x = zip(
+        *([np.random.default_rng(s) for s in t.spawn(2)] for t in trials)
+    )
+    if chunk_size is None:
+        chunk_size = max(1, 2**22 // max(1, (n + inputs.shape[0]) * n_trials))
+
+    m = W.shape[0]
+    errors = np.zeros((m, n_trials))
+    scored = np.zeros(m)
+    max_dev = np.zeros(m)
+
+    def score(step: int, r: np.ndarray):
+        if step < settle:
+            return
+        o = W @ r
+        ref = o[:, :1]
+        dev = o[:, 1:] - ref
+        np.maximum(max_dev, np.abs(dev).max(axis=1), out=max_dev)
+        mask = np.abs(ref[:, 0]) >= margin
+        errors[mask] += np.sign(o[mask, 1:]) != np.sign(ref[mask])
+        scored[mask] += 1
+
+    score(0, r)
+    for start in range(1, n_steps, chunk_size):
+        stop = min(n_steps, start + chunk_size)
+        steps = stop - start
+        dw_r = (
+            np.stack([g.standard_normal((steps, n)) for g in streams_r], axis=2)
+            if sigma_r
+            else None
+        )
+        dw_x = (
+            np.stack(
+                [g.standard_normal((steps, inputs.shape[0])) for g in streams_x],
+                axis=2,
+            )
+            if sigma_x
+            else None
+        )
+
+        for j in range(steps):
+            x = np.repeat(inputs[:, start + j - 1 : start + j], n_trials + 1, axis=1)
+            if dw_x is not None:
+                scale = x[:, 1:] if multiplicative else 1.0
+                x[:, 1:] += sigma_x * scale * dw_x[j]
+
+            diffusion = (
+                sigma_r * sqrt_dt * (r[:, 1:] if multiplicative else 1.0) * dw_r[j]
+                if sigma_r
+                else 0.0
+            )
+            drift = res.gamma * (-r + np.tanh(res.A @ r + res.B @ x + res.d))
+            r = r + dt * drift
+            r[:, 1:] += diffusion
+            score(start + j, r)
+
+    stats = EnsembleStats(n_trials, n_steps, list(res.output_names))
+    stats.error_rate = errors.sum(axis=1) / np.maximum(scored * n_trials, 1)
+    stats.flip_prob = (errors > 0).mean(axis=1)
+    stats.max_dev = max_dev
+    final = W @ r
+    stats.final_mean = final[:, 1:].mean(axis=1)
+    stats.final_std = final[:, 1:].std(axis=1)
+    stats.reference_final = final[:, 0]
+    return stats
@@ -0,0 +1,141 @@
+"""
+Grouped execution of flyweight composites (see _prnn.instanced): the instances
+of each prototype advance together as one (n x n) @ (n x N) product, and the
+rank-one couplings between instances are a gather of source readouts scattered
+into the target instances' input ports.
+"""
+
+import numpy as np
+from _prnn.instanced import InstancedReservoir
+from _prnn.reservoir import _dense
+
+
+class _Group:
+    """All instances of one prototype; instance columns in `members` order"""
+
+    def __init__(self, inst: InstancedReservoir, p: int):
+        res = inst.prototypes[p]
+        self.members = np.flatnonzero(inst.proto == p)
+        self.A = _dense(res.A)
+        self.B, self.W = inst._io[p]
+        self.n = self.A.shape[0]
+        # neuron rows of each member in the composite, n x N
+        self.rows = inst.offsets[self.members] + np.arange(self.n)[:, None]
+        self.d = inst.d[self.rows, 0]
+
+
+class GroupedEngine:
+    """
+    Runs an InstancedReservoir without materializing it. Same dynamics and RK4
+    update as Reservoir.run; self.r is the composite state (zeros by default).
+    """
+
+    def __init__(self, inst: InstancedReservoir, r: np.ndarray = None):
+        self.inst = inst
+        self.global_timescale = inst.global_timescale
+        self.gamma = inst.gamma
+        self.groups = [_Group(inst, p) for p in range(len(inst.prototypes))]
+        self.r = r if r is not None else np.zeros((inst.dim, 1))
+
+        # instance -> (group, column)
+        group_of = inst.proto
+        slot = np.zeros(len(inst.proto), dtype=int)
+        for g in self.groups:
+            slot[g.members] = np.arange(len(g.members))
+
+        # external inputs: x[col] -> X[group][port, slot]
+        self.ext = []
+        for q in range(len(self.groups)):
+            sel = group_of[inst.inputs[:, 0]] == q
+            k, j, col = inst.inputs[sel].T
+            self.ext.append((j, slot[k], col))
+
+        # couplings by (target group, source group): Y[src][i, slot] -> X[tar][j, slot]
+        self.links = []
+        tar, j, src, i = inst.couplings.T
+        for q in range(len(self.groups)):
+            for p in range(len(self.groups)):
+                sel = (group_of[tar] == q) & (group_of[src] == p)
+                if np.any(sel):
+                    self.links.append(
+                        (q, p, j[sel], slot[tar[sel]], i[sel], slot[src[sel]])
+                    )
+
+        # composite readouts: row <- Y[group][i, slot]
+        k, i, row = inst.outputs.T
+        self.readouts = [
+            (row[sel], i[sel], slot[k[sel]])
+            for sel in (group_of[k] == q for q in range(len(self.groups)))
+        ]
+        self.n_outputs = len(inst.output_names)
+
+    def _split(self, r: np.ndarray) -> list[np.ndarray]:
+        return [r[g.rows, 0] for g in self.groups]
+
+    def _join(self, R: list[np.ndarray], out: np.ndarray):
+        for g, Rg in zip(self.groups, R):
+            out[g.rows] = Rg
+
+    def _readouts(self, R: list[np.ndarray]) -> list[np.ndarray]:
+        return [g.W @ Rg for g, Rg in zip(self.groups, R)]
+
+    def del_r(self, R: list[np.ndarray], x: np.ndarray) -> list[np.ndarray]:
+        Y = self._readouts(R)
+        X = [np.zeros((g.B.shape[1], len(g.members))) for g in self.groups]
+        for Xq, (j, s, col) in zip(X, self.ext):
+            Xq[j, s] = x[col]
+        for q, p, j, s_tar, i, s_src in self.links:
+            np.add.at(X[q], (j, s_tar), Y[p][i, s_src])
+        return [
+            self.gamma * (-Rg + np.tanh(g.A @ Rg + g.B @ Xg + g.d))
+            for g, Rg, Xg in zip(self.groups, R, X)
+        ]
+
+    def propagate(self, R: list[np.ndarray], x: np.ndarray) -> list[np.ndarray]:
+        """One step of the update in Reservoir.propagate, x held over the step"""
+        dt = self.global_timescale
+        k1 = [dt * k for k in self.del_r(R, x)]
+        k2 = [dt * k for k in self.del_r([r + a / 2 for r, a in zip(R, k1)], x)]
+        k3 = [dt * k for k in self.del_r([r + a / 2 for r, a in zip(R, k2)], x)]
+        k4 = [dt * k for k in self.del_r([r + a for r, a in zip(R, k3)], x)]
+        return [
+            r + (a + 2 * b + 2 * (c + e)) / 6
+            for r, a, b, c, e in zip(R, k1, k2, k3, k4)
+        ]
+
+    def run(self, inputs: np.ndarray = None, time=None, ret_states=False) -> np.ndarray:
+        """
+        Runs forward from self.r; returns composite readouts (or states if
+        ret_states), matching inst.materialize().run(...).
+        """
+        if inputs is None:
+            assert (
+                time is not None
+            ), "error: run: if reservoir has no inputs, run requires 'time' argument"
+            inputs = np.zeros((self.inst.x_init.shape[0], time))
+        else:
+            assert (
+                inputs.shape[0] == self.inst.x_init.shape[0]
+            ), f"input dimension mismatch: passed {inputs.shape[0]} but expected {self.inst.x_init.shape[0]}"
+
+        nx = inputs.shape[1]
+        R = self._split(self.r)
+        states = np.zeros((self.inst.dim, nx)) if ret_states else None
+        outputs = np.zeros((self.n_outputs, nx)) if not ret_states else None
+
+        def record(R: list[np.ndarray], t: int):
+            if ret_states:
+                self._join(R, states[:, t])
+                return
+            for Yq, (row, i, s) in zip(self._readouts(R), self.readouts):
+                outputs[row, t] = Yq[i, s]
+
+        record(R, 0)
+        for t in range(1, nx):
+            R = self.propagate(R, inputs[:, t - 1])
+            record(R, t)
+
+        r = np.zeros((self.inst.dim, 1))
+        self._join(R, r[:, 0])
+        self.r = r
+        return states if ret_states else outputs
@@ -0,0 +1,151 @@
+"""
+Flyweight composites: repeated constituent reservoirs are stored once as
+prototypes, with per-instance neuron offsets and the rank-one couplings between
+instances. Dense or sparse Reservoirs are materialized only on request.
+"""
+
+import numpy as np
+import scipy.sparse as sps
+from _prnn.reservoir import Reservoir, _dense
+
+
+class InstancedReservoir:
+    """
+    Composite of N instances of P distinct reservoirs (prototypes).
+    * proto[k], offsets[k]: prototype index and first composite neuron of instance k
+    * couplings: rows (tar, j, src, i), instance tar's input j driven by readout i
+      of instance src, i.e. the block B_tar[:, j] W_src[i] of A
+    * inputs: rows (instance, local input, composite column)
+    * outputs: rows (instance, local output, composite row)
+    * d, r_init, x_init: composite vectors (constant inputs already folded into d)
+    Prototypes cost O(P n^2); everything else is O(N n + couplings).
+    """
+
+    def __init__(
+        self,
+        prototypes: list[Reservoir],
+        proto,
+        offsets,
+        couplings,
+        inputs,
+        outputs,
+        d: np.ndarray,
+        r_init: np.ndarray,
+        x_init: np.ndarray,
+        global_timescale=0.001,
+        gamma=100,
+        names: list[str] = None,
+        input_names: list[str] = None,
+        output_names: list[str] = None,
+    ):
+        self.prototypes = prototypes
+        self.proto = np.asarray(proto, dtype=int)
+        self.offsets = np.asarray(offsets, dtype=int)
+        self.couplings = np.asarray(couplings, dtype=int).reshape(-1, 4)
+        self.inputs = np.asarray(inputs, dtype=int).reshape(-1, 3)
+        self.outputs = np.asarray(outputs, dtype=int).reshape(-1, 3)
+        self.d = d
+        self.r_init = r_init
+        self.x_init = x_init
+        self.global_timescale = global_timescale
+        self.gamma = gamma
+        self.names = names if names is not None else []
+        self.input_names = input_names if input_names is not None else []
+        self.output_names = output_names if output_names is not None else []
+
+        self.dim = int(d.shape[0])
+        self._io = [(_dense(p.B), _dense(p.W)) for p in prototypes]
+
+    def size(self, k: int) -> int:
+        """Neurons in instance k"""
+        return self.prototypes[self.proto[k]].A.shape[0]
+
+    def B(self, k: int) -> np.ndarray:
+        return self._io[self.proto[k]][0]
+
+    def W(self, k: int) -> np.ndarray:
+        return self._io[self.proto[k]][1]
+
+    def nbytes(self) -> int:
+        """Bytes held by the flyweight form (prototype matrices and index arrays)"""
+        total = 0
+        for p in self.prototypes:
+            for M in (p.A, p.B, p.W):
+                total += M.data.nbytes if sps.issparse(M) else np.asarray(M).nbytes
+        for arr in (
+            self.proto,
+            self.offsets,
+            self.couplings,
+            self.inputs,
+            self.outputs,
+        ):
+            total += arr.nbytes
+        return total + self.d.nbytes + self.r_init.nbytes + self.x_init.nbytes
+
+    def materialize(self, sparse=False, sparse_io=False) -> Reservoir:
+        """
+        Expands into one Reservoir. sparse: A as a scipy.sparse CSR array built
+        from COO triplets; sparse_io: likewise for B and W.
+        """
+        n_in = len(self.input_names)
+        a, b, w = _Triplets(), _Triplets(), _Triplets()
+
+        blocks = [sps.coo_array(p.A) for p in self.prototypes]
+        for k, off in enumerate(self.offsets):
+            a.add_coo(blocks[self.proto[k]], off, off)
+        for k, j, col in self.inputs:
+            b.add_block(self.B(k)[:, [j]], self.offsets[k], col)
+        for k, i, row in self.outputs:
+            w.add_block(self.W(k)[[i]], row, self.offsets[k])
+        for tar, j, src, i in self.couplings:
+            a.add_outer(
+                self.B(tar)[:, j], self.W(src)[i], self.offsets[tar], self.offsets[src]
+            )
+
+        return Reservoir(
+            A=a.build((self.dim, self.dim), sparse),
+            B=b.build((self.dim, max(n_in, 1)), sparse and sparse_io),
+            W=w.build((len(self.output_names), self.dim), sparse and sparse_io),
+            x_init=self.x_init.copy(),
+            r_init=self.r_init.copy(),
+            d=self.d.copy(),
+            global_timescale=self.global_timescale,
+            gamma=self.gamma,
+            input_names=list(self.input_names),
+            output_names=list(self.output_names),
+        )
+
+
+class _Triplets:
+    """COO (row, col, value) chunks of a composite matrix"""
+
+    def __init__(self):
+        self.rows, self.cols, self.vals = [], [], []
+
+    def add_coo(self, coo: sps.coo_array, row0: int, col0: int):
+        self.rows.append(coo.row + row0)
+        self.cols.append(coo.col + col0)
+        self.vals.append(coo.data)
+
+    def add_block(self, M: np.ndarray, row0: int, col0: int):
+        self.add_coo(sps.coo_array(M), row0, col0)
+
+    def add_outer(self, u: np.ndarray, v: np.ndarray, row0: int, col0: int):
+        """Rank-one block u v^T at (row0, col0), over the non-zeros only"""
+        iu, iv = np.flatnonzero(u), np.flatnonzero(v)
+        self.rows.append(np.repeat(iu + row0, len(iv)))
+        self.cols.append(np.tile(iv + col0, len(iu)))
+        self.vals.append(np.outer(u[iu], v[iv]).ravel())
+
+    def build(self, shape: tuple, sparse: bool):
+        if not self.vals:
+            return sps.csr_array(shape) if sparse else np.zeros(shape)
+        rows, cols, vals = (
+            np.concatenate(x) for x in (self.rows, self.cols, self.vals)
+        )
+        if sparse:
+            # duplicates (block + couplings on the same entry) are summed
+            return sps.coo_array((vals, (rows, cols)), shape=shape).tocsr()
+        M = np.zeros(shape)
+        np.add.at(M, (rows, cols), vals)
+        return M
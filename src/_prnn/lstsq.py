@@ -0,0 +1,138 @@
+"""
+Least-squares backends for the readout fit W @ D ~= O of gen_baseRNN, where D
+is the latent x terms DNP basis. Besides the dense SVD they offer solvers that
+never factor the latent x terms matrix:
+* lsqr / lsmr: Krylov iterations on the operator D.T, one output at a time
+* sketch: randomized sketch-and-solve on a Gaussian sketch of the larger side
+* tikhonov: regularized normal equations in whichever of latent/terms is smaller
+"""
+
+import numpy as np
+import scipy.sparse.linalg as spla
+
+SOLVERS = ("dense", "lsqr", "lsmr", "sketch", "tikhonov")
+
+
+class SolveReport:
+    """
+    How well a readout fit went.
+    * residual: ||W @ D - O|| / ||O|| (Frobenius)
+    * cond: condition number estimate of the system the solver actually handled
+    * iterations: per-output iteration counts (iterative solvers only)
+    """
+
+    def __init__(self, solver: str):
+        self.solver = solver
+        self.residual: float = None
+        self.cond: float = None
+        self.iterations: list[int] = None
+
+    def print(self):
+        print("--------------------")
+        print(f"Solver: {self.solver}")
+        print(f"relative residual: {self.residual:.3e}")
+        print(f"condition estimate: {self.cond:.3e}")
+        if self.iterations is not None:
+            print(f"iterations: {self.iterations}")
+        print("--------------------")
+
+
+def relative_residual(W: np.ndarray, D: np.ndarray, O: np.ndarray) -> float:
+    """||W @ D - O|| / ||O||"""
+    return float(
+        np.linalg.norm(W @ D - O) / max(np.linalg.norm(O), np.finfo(float).tiny)
+    )
+
+
+def solve(
+    D: np.ndarray,
+    O: np.ndarray,
+    solver: str = "dense",
+    rcond: float = None,
+    damp: float = 0.0,
+    atol: float = 1e-12,
+    btol: float = 1e-12,
+    maxiter: int = None,
+    conlim: float = 1e12,
+    oversample: int = 4,
+    seed: int = 0,
+) -> tuple[np.ndarray, SolveReport]:
+    """
+    Minimum-norm (or damped) W with W @ D ~= O. D: latent x terms, O: outputs x terms.
+    * rcond: relative singular value cutoff (dense, sketch)
+    * damp: Tikhonov weight lambda in ||W D - O||^2 + lambda^2 ||W||^2
+      (lsqr, lsmr, tikhonov; tikhonov defaults to sqrt(eps) * ||D||_F)
+    * atol, btol, maxiter, conlim: stopping criteria of lsqr/lsmr
+      (maxiter defaults to 20 x the smaller dimension of D)
+    * oversample: sketch size as a multiple of the smaller dimension of D
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"solver must be one of {SOLVERS}, got '{solver}'")
+    D = np.asarray(D, dtype=float)
+    O = np.atleast_2d(np.asarray(O, dtype=float))
+    report = SolveReport(solver)
+
+    if solver == "dense":
+        X, _, _, s = np.linalg.lstsq(D.T, O.T, rcond=rcond)
+        W = X.T
+        report.cond = cond_estimate(s, rcond, D.shape)
+
+    elif solver in ("lsqr", "lsmr"):
+        op = spla.aslinearoperator(D.T)
+        maxiter = maxiter if maxiter is not None else 20 * min(D.shape)
+        opts = dict(damp=damp, atol=atol, btol=btol, conlim=conlim)
+        W = np.zeros((O.shape[0], D.shape[0]))
+        report.iterations = []
+        conds = []
+        for row in range(O.shape[0]):
+            if solver == "lsqr":
+                out = spla.lsqr(op, O[row], iter_lim=maxiter, **opts)
+            else:
+                out = spla.lsmr(op, O[row], maxiter=maxiter, **opts)
+            # both return (x, istop, itn, ..., cond(A) at index 6, ...)
+            W[row], itn, acond = out[0], out[2], out[6]
+            report.iterations.append(int(itn))
+            conds.append(float(acond))
+        report.cond = max(conds) if conds else 1.0
+
+    elif solver == "sketch":
+        rng = np.random.default_rng(seed)
+        latent, terms = D.shape
+        size = min(max(latent, terms), oversample * min(latent, terms))
+        if terms >= latent:
+            # tall D.T: compress the equations
+            S = rng.standard_normal((size, terms)) / np.sqrt(size)
+            X, _, _, s = np.linalg.lstsq(S @ D.T, S @ O.T, rcond=rcond)
+            W = X.T
+        else:
+            # wide D.T: restrict W to a random subspace of the latent space
+            Q, _ = np.linalg.qr(rng.standard_normal((latent, size)))
+            X, _, _, s = np.linalg.lstsq(D.T @ Q, O.T, rcond=rcond)
+            W = (Q @ X).T
+        report.cond = cond_estimate(s, rcond, D.shape)
+
+    else:
+        if not damp:
+            damp = np.sqrt(np.finfo(float).eps) * np.linalg.norm(D)
+        latent, terms = D.shape
+        if terms <= latent:
+            # dual form: W = Z D.T with Z (D.T D + lambda^2 I) = O
+            G = D.T @ D + damp**2 * np.eye(terms)
+            W = np.linalg.solve(G, O.T).T @ D.T
+        else:
+            G = D @ D.T + damp**2 * np.eye(latent)
+            W = np.linalg.solve(G, D @ O.T).T
+        report.cond = float(np.linalg.cond(G))
+
+    report.residual = relative_residual(W, D, O)
+    return W, report
+
+
+def cond_estimate(s: np.ndarray, rcond: float, shape: tuple) -> float:
+    """s_max / smallest singular value kept under rcond"""
+    if s.size == 0 or s[0] == 0:
+        return np.inf
+    if rcond is None:
+        rcond = np.finfo(float).eps * max(shape)
+    kept = s[s > rcond * s[0]]
+    return float(s[0] / kept[-1])
@@ -0,0 +1,160 @@
+"""Post-solve model-order reduction: prune neurons that barely reach the readouts"""
+
+import numpy as np
+from _prnn.reservoir import Reservoir, _dense
+
+
+class ReductionReport:
+    """
+    Error of a reduced reservoir on the reference inputs it was fitted on.
+    * n_before, n_after: neuron counts
+    * max_error: per readout, largest |reduced - original| over all sequences
+    * rel_error: max_error relative to each readout's peak magnitude
+    * kept: indices of the original neurons that survived
+    """
+
+    def __init__(self, n_before: int, n_after: int, output_names: list[str]):
+        self.n_before = n_before
+        self.n_after = n_after
+        self.output_names = output_names
+        self.max_error: np.ndarray = None
+        self.rel_error: np.ndarray = None
+        self.kept: np.ndarray = None
+
+    def print(self, precision=4):
+        print("--------------------")
+        print(f"Reduced: {self.n_before} -> {self.n_after} neurons")
+        names = self.output_names or [f"o{i}" for i in range(len(self.max_error))]
+        for i, name in enumerate(names):
+            print(
+                f"{name}: max_error={self.max_error[i]:.{precision}e} "
+                f"rel_error={self.rel_error[i]:.{precision}e}"
+            )
+        print("--------------------")
+
+
+def _simulate(res: Reservoir, sequences: list, time: int, W=None) -> list:
+    """States of res from its current r for each sequence; res.r is left untouched"""
+    r = res.r
+    out = []
+    for x in sequences:
+        res.r = r.copy()
+        out.append(res.run(x, time=time, W=W, ret_states=True))
+    res.r = r
+    return out
+
+
+def sensitivity(res: Reservoir, states: np.ndarray, W: np.ndarray = None) -> np.ndarray:
+    """
+    Per-neuron importance: how strongly a neuron's fluctuations reach the
+    readouts, directly through W and one step removed through A.
+    """
+    W = W if W is not None else res.W
+    A = _dense(res.A)
+    reach = np.abs(W).sum(axis=0)
+    reach = reach + np.abs(A).T @ reach
+    return reach * states.std(axis=1)
+
+
+def project(
+    res: Reservoir, kept: np.ndarray, states: np.ndarray, W: np.ndarray = None
+) -> Reservoir:
+    """
+    Reservoir on the neurons `kept`. The dropped states are regressed on the
+    kept ones (r_drop ~ M r_keep + c) over the snapshots; M folds into A, c into
+    d, and W is refitted directly against the original readouts.
+    """
+    W = W if W is not None else res.W
+    A = _dense(res.A)
+    n = A.shape[0]
+    dropped = np.setdiff1d(np.arange(n), kept)
+
+    S_keep = states[kept]
+    A_new = A[np.ix_(kept, kept)]
+    d_new = np.asarray(res.d).reshape(-1, 1)[kept].copy()
+    if len(dropped) and np.any(A[np.ix_(kept, dropped)]):
+        X = np.vstack([S_keep, np.ones((1, S_keep.shape[1]))])
+        coef = np.linalg.lstsq(X.T, states[dropped].T, rcond=None)[0].T
+        M, c = coef[:, :-1], coef[:, -1:]
+        A_kd = A[np.ix_(kept, dropped)]
+        A_new = A_new + A_kd @ M
+        d_new = d_new + A_kd @ c
+    W_new = np.linalg.lstsq(S_keep.T, (W @ states).T, rcond=None)[0].T
+
+    reduced = Reservoir(
+        A_new,
+        np.asarray(res.B)[kept],
+        np.asarray(res.r_init).reshape(-1, 1)[kept],
+        res.x_init,
+        res.global_timescale,
+        res.gamma,
+        d_new,
+        W_new,
+        name=res.name,
+        input_names=list(res.input_names),
+        output_names=list(res.output_names),
+        r=np.asarray(res.r).reshape(-1, 1)[kept].copy(),
+    )
+    return reduced
+
+
+def reduce(
+    res: Reservoir,
+    inputs=None,
+    time: int = None,
+    tol: float = 1e-2,
+    W: np.ndarray = None,
+    min_neurons: int = 1,
+    verbose=False,
+) -> tuple[Reservoir, ReductionReport]:
+    """
+    Smallest sensitivity-pruned projection of res whose readouts stay within
+    tol (relative to each readout's peak) of the original on the reference
+    inputs: one input array or a list of them (None with `time` for void-input
+    reservoirs). The kept count is bisected, so acceptance is assumed to be
+    monotone in it. Returns the reduced reservoir and its error report.
+    """
+    W = W if W is not None else res.W
+    assert (
+        W is not None
+    ), "error: reduce: W must be defined, either by argument or in reservoir object"
+    sequences = inputs if isinstance(inputs, (list, tuple)) else [inputs]
+
+    runs = _simulate(res, sequences, time, W)
+    states = np.concatenate(runs, axis=1)
+    refs = [W @ s for s in runs]
+    scale = np.maximum(
+        np.abs(np.concatenate(refs, axis=1)).max(axis=1), np.finfo(float).tiny
+    )
+    order = np.argsort(-sensitivity(res, states, W), kind="stable")
+
+    def evaluate(m: int):
+        kept = np.sort(order[:m])
+        reduced = project(res, kept, states, W)
+        outs = [reduced.W @ s for s in _simulate(reduced, sequences, time)]
+        err = np.max(
+            [np.abs(o - ref).max(axis=1) for o, ref in zip(outs, refs)], axis=0
+        )
+        if verbose:
+            print(f"reduce: {m} neurons, rel_error={np.max(err / scale):.2e}")
+        return reduced, kept, err
+
+    n = res.A.shape[0]
+    best = None
+    lo, hi = max(1, min_neurons), n
+    while lo < hi:
+        mid = (lo + hi) // 2
+        reduced, kept, err = evaluate(mid)
+        if np.all(err <= tol * scale):
+            best, hi = (reduced, kept, err), mid
+        else:
+            lo = mid + 1
+    if best is None or best[0].A.shape[0] != hi:
+        best = evaluate(hi)
+
+    reduced, kept, err = best
+    report = ReductionReport(n, len(kept), list(res.output_names))
+    report.max_error = err
+    report.rel_error = err / scale
+    report.kept = kept
+    return reduced, report
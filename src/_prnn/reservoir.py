@@ -1,14 +1,22 @@
 import os
+import re
+import time
 import pickle as pkl
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import sympy as sp
 import scipy
+import scipy.sparse
 
 
 # import sympy as sp
 import jax
 import jax.numpy as jnp
 import matplotlib.pyplot as plt
+from _prnn.basis import BasisCache, basis_cache, build_basis
+from _prnn.basis import poly_output_matrix, expand_symmetric
+from _prnn import cache as solve_cache
 
 jax.config.update("jax_enable_x64", True)
 
@@ -26,6 +34,71 @@ Reservoir Structure:
 """
 
 
+def _sym2poly(expr: sp.Expr, gens: list[sp.Symbol]) -> tuple[np.ndarray, np.ndarray]:
+    """(coeffs, exps) of a polynomial sympy expression in gens"""
+    terms = sp.Poly(expr, *gens).terms()
+    coeffs = np.array([float(c) for _, c in terms])
+    exps = np.array([m for m, _ in terms], dtype=int).reshape(-1, len(gens))
+    return coeffs, exps
+
+
+def _suffix_key(name: str) -> tuple:
+    """Order of solve's inputs: by numeric suffix (s1 < s2 < s10), ties first-seen"""
+    digits = re.search(r"\d+$", name)
+    return (0, int(digits.group())) if digits else (1, name)
+
+
+def _rhs_order(eqs) -> list[str]:
+    """Input names in the order solve assigns them (each lhs is also an input)"""
+    names = []
+    for lhs, rhs in eqs:
+        free = sp.sympify(rhs).free_symbols | {lhs}
+        for sym in sorted(free, key=lambda s: s.name):
+            if str(sym) not in names:
+                names.append(str(sym))
+    return sorted(names, key=_suffix_key)
+
+
+def _eq_components(eqs) -> list[list[int]]:
+    """Groups of equation indices connected through shared symbols"""
+    parent = list(range(len(eqs)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    owner = {}
+    for i, (lhs, rhs) in enumerate(eqs):
+        for sym in sp.sympify(rhs).free_symbols | {lhs}:
+            j = owner.setdefault(sym, i)
+            parent[find(i)] = find(j)
+
+    groups = {}
+    for i in range(len(eqs)):
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
+
+
+def _dense(M) -> np.ndarray:
+    return M.toarray() if scipy.sparse.issparse(M) else np.asarray(M)
+
+
+def _is_zero(M) -> bool:
+    """All-zero check for dense or scipy.sparse matrices"""
+    if scipy.sparse.issparse(M):
+        return not np.any(M.data)
+    return not np.any(M)
+
+
+def _solve_timed(eqs, kwargs) -> tuple["Reservoir", float]:
+    """solve_many worker: (reservoir, wall time)"""
+    start = time.perf_counter()
+    R = Reservoir.solve(eqs, **kwargs)
+    return R, time.perf_counter() - start
+
+
 class Reservoir:
     """
     Core
@@ -86,6 +159,7 @@ class Reservoir:
         self.e = np.zeros((A.shape[0], 1)) if e is None else e
 
         self.W: np.ndarray = W
+        self.solve_report = None  # set by gen_baseRNN (see _prnn.lstsq)
 
         # for circuitry
         self.usedInputs = set()
@@ -113,7 +187,138 @@ class Reservoir:
     """
 
     @staticmethod
-    def solve(eqs, fold_recurrent_outputs=False, ic: np.ndarray = None, verbose=False):
+    def solve(
+        eqs,
+        fold_recurrent_outputs=False,
+        ic: np.ndarray = None,
+        verbose=False,
+        global_timescale=0.001,
+        gamma=100,
+        cache_dir: str = None,
+        latent_dim=None,
+        split=False,
+        solver="svd",
+    ):
+        """
+        Solves a list of (lhs, rhs) equations (or sp.Eq) for a reservoir.
+        If cache_dir (or $PYRES_SOLVE_CACHE) is set, results are stored there,
+        keyed by the canonical equations and parameters, and returned from disk
+        on later calls. latent_dim: see gen_baseRNN ("auto" searches for the
+        smallest adequate reservoir). split: equations that share no symbols
+        are solved as separate blocks and stacked into one reservoir.
+        solver: least-squares backend, see gen_baseRNN.
+        """
+        eqs = [(eq.lhs, eq.rhs) if isinstance(eq, sp.Eq) else eq for eq in eqs]
+
+        directory = solve_cache.cache_dir(cache_dir)
+        if directory is not None:
+            key = solve_cache.solve_key(
+                eqs,
+                ic,
+                fold_recurrent_outputs=bool(fold_recurrent_outputs),
+                global_timescale=float(global_timescale),
+                gamma=float(gamma),
+                latent_dim=latent_dim,
+                split=bool(split),
+                solver=solver,
+            )
+            R = solve_cache.load(directory, key)
+            if R is not None:
+                if verbose:
+                    print(f"solve: cache hit {key[:12]}")
+                return R
+
+        params = dict(
+            global_timescale=global_timescale,
+            gamma=gamma,
+            latent_dim=latent_dim,
+            solver=solver,
+        )
+        groups = _eq_components(eqs) if split else [list(range(len(eqs)))]
+        if len(groups) == 1:
+            R = Reservoir._solve(eqs, fold_recurrent_outputs, ic, verbose, **params)
+        else:
+            R = Reservoir._solve_split(
+                eqs, groups, fold_recurrent_outputs, ic, verbose, **params
+            )
+        if directory is not None:
+            solve_cache.store(directory, key, R)
+        return R
+
+    @staticmethod
+    def solve_many(systems, processes: int = None, ret_timings=False, **params):
+        """
+        Solves several independent systems over a process pool; returns the
+        reservoirs in order (and per-system wall times in seconds if ret_timings).
+        * systems: each a list of equations, or an (eqs, kwargs) pair whose kwargs
+          override params for that system
+        * processes: pool size (default: os.cpu_count()); 1 solves in-process
+        * params: keyword arguments to solve shared by every system
+        """
+        jobs = []
+        for system in systems:
+            if isinstance(system, tuple) and len(system) == 2 and isinstance(
+                system[1], dict
+            ):
+                jobs.append((system[0], {**params, **system[1]}))
+            else:
+                jobs.append((system, dict(params)))
+
+        processes = processes or os.cpu_count() or 1
+        if processes == 1 or len(jobs) <= 1:
+            results = [_solve_timed(eqs, kwargs) for eqs, kwargs in jobs]
+        else:
+            # spawn: jax is not fork-safe once initialised
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=min(processes, len(jobs)), mp_context=ctx
+            ) as pool:
+                futures = [pool.submit(_solve_timed, eqs, kw) for eqs, kw in jobs]
+                results = [f.result() for f in futures]
+
+        reservoirs = [R for R, _ in results]
+        timings = [t for _, t in results]
+        if params.get("verbose"):
+            for i, t in enumerate(timings):
+                print(f"solve_many: system {i} solved in {t:.3f}s")
+        return (reservoirs, timings) if ret_timings else reservoirs
+
+    @staticmethod
+    def _solve_split(eqs, groups, fold_recurrent_outputs, ic, verbose, **params):
+        """Solves each independent group of eqs and stacks the blocks in the original order"""
+        from _prnn.circuit import Circuit
+
+        rhs_order = _rhs_order(eqs)
+        lhs_order = [str(lhs) for lhs, _ in eqs]
+
+        parts = []
+        for group in groups:
+            sub_eqs = [eqs[i] for i in group]
+            sub_ic = None
+            if ic is not None:
+                sub_ic = ic[[rhs_order.index(n) for n in _rhs_order(sub_eqs)]]
+            parts.append(
+                Reservoir._solve(
+                    sub_eqs, fold_recurrent_outputs, sub_ic, verbose, **params
+                )
+            )
+        R = Circuit([], reservoirs=parts).stack()
+
+        # back to the input/output order of the unsplit system
+        if R.input_names:
+            perm = np.argsort(
+                [rhs_order.index(n) for n in R.input_names], kind="stable"
+            )
+            R.B, R.x_init = R.B[:, perm], R.x_init[perm]
+            R.input_names = [R.input_names[i] for i in perm]
+        perm = np.argsort([lhs_order.index(n) for n in R.output_names], kind="stable")
+        R.W = R.W[perm]
+        R.output_names = [R.output_names[i] for i in perm]
+        return R
+
+    @staticmethod
+    def _solve(eqs, fold_recurrent_outputs, ic, verbose, **params):
+        # params: keyword arguments passed on to gen_baseRNN
         # convert to non-evaluated sp eqs
         sp_eqs: list[sp.Eq] = []
         for lhs, rhs in eqs:
@@ -143,18 +348,108 @@ class Reservoir:
             if poly:
                 max_pow = max(max_pow, poly.total_degree())
 
+        # B columns, input_names and recs all follow this order
+        rhs.sort(key=lambda sym: _suffix_key(sym.name))
         for sym in rhs:
             if sym in lhs:
                 recs.add((lhs.index(sym), rhs.index(sym)))
 
         # generate lambda
-        sorted_rhs = sorted(rhs, key=lambda sym: int(sym.name[1:]))
+        sorted_rhs = rhs
         print(sorted_rhs)
 
-        f = sp.lambdify(sorted_rhs, [eq.rhs for eq in sp_eqs], "jax")
-        R = Reservoir.gen_baseRNN(lambda x: f(*x), len(rhs), max_pow + 1, recs)
-        R.input_names = [str(x) for x in rhs]
-        R.output_names = [str(x) for x in lhs]
+        # polynomial systems skip lambdify/autodiff: coefficients are read off sp.Poly
+        if all(eq.rhs.is_polynomial(*sorted_rhs) for eq in sp_eqs):
+            eq_src = [_sym2poly(eq.rhs, sorted_rhs) for eq in sp_eqs]
+        else:
+            f = sp.lambdify(sorted_rhs, [eq.rhs for eq in sp_eqs], "jax")
+            eq_src = lambda x: f(*x)
+
+        R = Reservoir.gen_baseRNN(
+            eq_src, len(rhs), max_pow + 1, recs, verbose=verbose, **params
+        )
+        return Reservoir._finish_solve(
+            R,
+            [str(x) for x in rhs],
+            [str(x) for x in lhs],
+            recs,
+            ic,
+            fold_recurrent_outputs,
+            verbose,
+        )
+
+    @staticmethod
+    def solve_poly(
+        polys,
+        input_names: list[str],
+        output_names: list[str],
+        fold_recurrent_outputs=False,
+        ic: np.ndarray = None,
+        verbose=False,
+        global_timescale=0.001,
+        gamma=100,
+        latent_dim=None,
+        solver="svd",
+    ):
+        """
+        Numeric counterpart of solve that bypasses SymPy: polys holds one
+        (coeffs, exps) pair per output, exps being a terms x len(input_names)
+        exponent matrix. As in solve, every output is also fed back as an
+        input; outputs missing from input_names are appended to them.
+        """
+        assert len(polys) == len(
+            output_names
+        ), "solve_poly: need one polynomial per output"
+        n_given = len(input_names)
+        input_names = list(input_names) + [
+            name for name in output_names if name not in input_names
+        ]
+        k = len(input_names)
+        polys = [
+            (
+                coeffs,
+                np.pad(
+                    np.asarray(exps, dtype=int).reshape(-1, n_given),
+                    ((0, 0), (0, k - n_given)),
+                ),
+            )
+            for coeffs, exps in polys
+        ]
+        max_pow = max(int(exps.sum(axis=1).max(initial=0)) for _, exps in polys)
+        recs = {
+            (output_names.index(name), input_names.index(name))
+            for name in input_names
+            if name in output_names
+        }
+
+        R = Reservoir.gen_baseRNN(
+            polys,
+            k,
+            max_pow + 1,
+            recs,
+            global_timescale=global_timescale,
+            gamma=gamma,
+            verbose=verbose,
+            latent_dim=latent_dim,
+            solver=solver,
+        )
+        return Reservoir._finish_solve(
+            R,
+            list(input_names),
+            list(output_names),
+            recs,
+            ic,
+            fold_recurrent_outputs,
+            verbose,
+        )
+
+    @staticmethod
+    def _finish_solve(
+        R, input_names, output_names, recs, ic, fold_recurrent_outputs, verbose
+    ):
+        """Names the solved reservoir, applies ic and folds recurrences into A"""
+        R.input_names = input_names
+        R.output_names = output_names
 
         # set ic
         if ic is not None:
@@ -162,12 +457,12 @@ class Reservoir:
 
         # handle feedback
         if recs:
-            B = np.hstack([R.B[:, o].reshape(-1, 1) for o, _ in recs])
-            W = np.vstack([R.W[i, :].reshape(1, -1) for _, i in recs])
+            B = np.hstack([R.B[:, i].reshape(-1, 1) for _, i in recs])
+            W = np.vstack([R.W[o, :].reshape(1, -1) for o, _ in recs])
 
-            for ix in sorted({input_idx for input_idx, _ in recs}, reverse=True):
+            for ix in sorted({input_idx for _, input_idx in recs}, reverse=True):
                 R.remove_res_input(ix)
-            for ox in sorted({output_idx for _, output_idx in recs}, reverse=True):
+            for ox in sorted({output_idx for output_idx, _ in recs}, reverse=True):
                 if fold_recurrent_outputs:
                     R.remove_res_output(ox)
 
@@ -175,8 +470,8 @@ class Reservoir:
 
         if verbose:
             print("Recs:\n", recs)
-            print("Outputs:\n", lhs)
-            print("Inputs:\n", rhs)
+            print("Outputs:\n", output_names)
+            print("Inputs:\n", input_names)
             print(np.linalg.norm(R.W))
 
         return R
@@ -191,50 +486,71 @@ class Reservoir:
         gamma=100,
         verbose=False,
         ic=None,
+        symmetric=True,
+        seed=0,
+        cache: BasisCache = basis_cache,
+        latent_dim=None,
+        tol=1e-6,
+        seeds=None,
+        fidelity_inputs: np.ndarray = None,
+        fidelity_tol=1e-3,
+        solver="svd",
+        solver_options: dict = None,
     ):
-        # eq: python lambda function
-        # latent_dim: number of input variables in equations
+        # eq: python lambda function, or one (coeffs, exps) polynomial per output
+        # num_inputs: number of input variables in equations
         # eq_pow: largest power of inputs in equations
+        # symmetric: solve over unique monomials only (multinomial-weighted)
+        # cache: reuses the basis and its factorization across calls (None: rebuild)
+        # latent_dim: None (n_terms * 10), an int, or "auto" to search for the
+        #   smallest size meeting tol (relative lstsq residual) and fidelity_tol
+        #   (see _search_latent_dim), trying each of seeds (default: [seed])
+        # solver: "svd" (cached factorization) or a _prnn.lstsq backend, with
+        #   solver_options passed through; its SolveReport ends up in R.solve_report
 
-        # Random seed
-        np.random.seed(0)
-        rnga, rngb = jax.random.split(jax.random.PRNGKey(np.random.randint(1)), 2)
+        # randomness comes only from the seeded basis draw, so calls are
+        # reproducible and safe to run concurrently
 
         # Number of terms
         n_terms = 0
         for i in range(eq_pow + 1):
             n_terms += scipy.special.comb(num_inputs + i - 1, num_inputs - 1)
-        latent_dim = int(n_terms * 10)
-
-        # Initialize x0, B, r0, d
-        x0 = jnp.array(np.zeros(num_inputs))
-        B = (jax.random.uniform(rnga, (latent_dim, num_inputs)) - 0.5) / 50
-        r0 = jax.random.uniform(rnga, (latent_dim, 1)) - 0.5
-        d = jnp.squeeze(np.arctanh(r0)) - (B @ x0)
-
-        # Dynamical representational basis
-        f = lambda x: jnp.tanh(jnp.einsum("zi,i->z", B, x) + d)
-        DNP = f(x0)[:, jnp.newaxis]
-        for i in range(1, eq_pow + 1):
-            f = jax.jacfwd(f)
-            DNP = jnp.concatenate(
-                (DNP, jnp.reshape(f(x0), [latent_dim, jnp.power(num_inputs, i)], "F")),
-                axis=1,
-            )
+        default_dim = int(n_terms * 10)
+        search = latent_dim == "auto"
+        if latent_dim is None or search:
+            latent_dim = default_dim
+
+        factor = solver == "svd"
+
+        def get_basis(n, s):
+            if cache is not None:
+                return cache.get(num_inputs, eq_pow, n, s, symmetric, factor)
+            return build_basis(num_inputs, eq_pow, n, s, symmetric, factor)
+
+        # x0 is the origin whatever the basis
+        x0 = jnp.zeros(num_inputs)
 
         # Generate output matrix
-        O = jnp.array(eq(x0))[:, jnp.newaxis]
-        for i in range(1, eq_pow + 1):
-            eq = jax.jacfwd(eq)
-            O = jnp.concatenate(
-                (
-                    O,
-                    jnp.reshape(
-                        jnp.array(eq(x0)), [len(O), jnp.power(num_inputs, i)], "F"
+        compressed = not callable(eq)
+        if compressed:
+            # polynomial coefficients give the Taylor terms at x0 = 0 directly
+            O = jnp.array(poly_output_matrix(eq, num_inputs, eq_pow))
+            if not symmetric:
+                O = jnp.array(expand_symmetric(np.array(O), num_inputs, eq_pow))
+                compressed = False
+        else:
+            O = jnp.array(eq(x0))[:, jnp.newaxis]
+            for i in range(1, eq_pow + 1):
+                eq = jax.jacfwd(eq)
+                O = jnp.concatenate(
+                    (
+                        O,
+                        jnp.reshape(
+                            jnp.array(eq(x0)), [len(O), jnp.power(num_inputs, i)], "F"
+                        ),
                     ),
-                ),
-                axis=1,
-            )
+                    axis=1,
+                )
 
         # O = O / gamma + jnp.concatenate(
         #     (
@@ -257,22 +573,117 @@ class Reservoir:
 
         np.set_printoptions(linewidth=200)
 
-        # Solve
-        W, _, _, _ = jnp.linalg.lstsq(DNP.T, O.T)
+        def fit(basis):
+            O_prep = basis.prepare(O, compressed)
+            return basis.lstsq(O_prep, solver, **(solver_options or {}))
+
+        # Initialize x0, B, r0, d and the dynamical representational basis
+        if search:
+            basis = Reservoir._search_latent_dim(
+                fit,
+                get_basis,
+                int(n_terms),
+                default_dim,
+                seeds if seeds is not None else [seed],
+                tol,
+                fidelity_inputs,
+                fidelity_tol,
+                global_timescale,
+                gamma,
+                verbose,
+            )
+        else:
+            basis = get_basis(latent_dim, seed)
+
+        # Solve (monomials weighted by multiplicity)
+        W, report = fit(basis)
+
+        R = Reservoir._from_basis(basis, W, global_timescale, gamma)
+        R.solve_report = report
+        return R
 
+    @staticmethod
+    def _from_basis(basis, W, global_timescale, gamma):
         # Convert variables to numpy
+        latent_dim = basis.latent_dim
         A = np.zeros((latent_dim, latent_dim))  # Adjacency matrix
-        B = np.array(B)
-        r0 = np.array(r0)
-        x0 = np.array(x0)
-        W = np.array(W.T)
+        B = np.array(basis.B)
+        r0 = np.array(basis.r0)
+        x0 = np.array(basis.x0)
+        d = np.array(basis.d)
 
         R = Reservoir(
             A, B, r0, x0[:, np.newaxis], global_timescale, gamma, d[:, np.newaxis], W
         )
-        
+
         return R
 
+    @staticmethod
+    def _search_latent_dim(
+        fit,
+        get_basis,
+        lo,
+        hi,
+        seeds,
+        tol,
+        fidelity_inputs,
+        fidelity_tol,
+        global_timescale,
+        gamma,
+        verbose=False,
+    ):
+        """
+        Bisects latent_dim in [lo, hi] for the smallest basis (over seeds) whose
+        fit(basis) -> (W, SolveReport) has a relative residual below tol and whose
+        open-loop readouts on fidelity_inputs stay within fidelity_tol (relative
+        to their peak) of the default size-hi reservoir. Assumes acceptance is monotone in latent_dim.
+        Default fidelity inputs: 20 random levels in [-0.1, 0.1] held 50 steps each.
+        """
+        k = get_basis(hi, seeds[0]).B.shape[1]
+        if fidelity_inputs is None:
+            rng = np.random.default_rng(seeds[0])
+            levels = rng.uniform(-0.1, 0.1, (k, 20))
+            fidelity_inputs = np.repeat(levels, 50, axis=1)
+
+        def simulate(basis, W):
+            R = Reservoir._from_basis(basis, W, global_timescale, gamma)
+            R.r = R.r_init.copy()
+            return R.run(fidelity_inputs)
+
+        ref_basis = get_basis(hi, seeds[0])
+        ref = simulate(ref_basis, fit(ref_basis)[0])
+        scale = max(np.abs(ref).max(), np.finfo(float).tiny)
+
+        def accept(n):
+            for s in seeds:
+                basis = get_basis(n, s)
+                W, report = fit(basis)
+                residual = report.residual
+                if residual > tol:
+                    continue
+                fidelity = np.abs(simulate(basis, W) - ref).max() / scale
+                if verbose:
+                    print(
+                        f"latent_dim={n} seed={s}: "
+                        f"residual={residual:.2e} fidelity={fidelity:.2e}"
+                    )
+                if fidelity <= fidelity_tol:
+                    return basis
+            return None
+
+        best = accept(hi) or ref_basis
+        while lo < hi:
+            mid = (lo + hi) // 2
+            basis = accept(mid)
+            if basis is not None:
+                best, hi = basis, mid
+            else:
+                lo = mid + 1
+
+        if verbose:
+            print(f"latent_dim search: chose {best.latent_dim}")
+        return best
+
     def remove_res_input(self, idx: int):
         if self.B.shape[1] > 1:
             self.B = np.delete(self.B, idx, axis=1)
@@ -326,7 +737,15 @@ class Reservoir:
         W=None,
         verbose=False,
         ret_states=False,
+        accumulators: list = None,
+        chunk_size: int = 1000,
     ):
+        """
+        Runs the reservoir forward from self.r. Returns W @ states (or states if
+        ret_states). If accumulators (see _prnn.stream) are given, the trajectory
+        is never stored: states are fed to them chunk_size steps at a time and the
+        accumulators are returned.
+        """
         # user specified W case
         W = W if W is not None else self.W
         assert (
@@ -338,18 +757,24 @@ class Reservoir:
             assert (
                 time is not None
             ), "error: run: if reservoir has no inputs, run requires 'time' argument"
-            assert np.all(
-                self.B == 0
+            assert _is_zero(
+                self.B
             ), "error: in void input case, B must be a vector or matrix of zeros"
             assert (
                 np.sum(self.x_init == 0) == 1
             ), "error: input void input case, x must contain exactly one zero"
+            if accumulators is not None:
+                return self._run_streaming(None, time, W, accumulators, chunk_size)
             inputs = np.zeros((1, time))
         # ensure input dim matches res
         else:
             assert (
                 inputs.shape[0] == self.x_init.shape[0]
             ), f"input dimension mismatch: passed {inputs.shape[0]} but expected {self.x_init.shape[0]}"
+            if accumulators is not None:
+                return self._run_streaming(
+                    inputs, inputs.shape[1], W, accumulators, chunk_size
+                )
 
         # Ensure 4 dim inputs on z axis
         inputs = inputs.reshape(inputs.shape[0], inputs.shape[1], 1)
@@ -373,6 +798,44 @@ class Reservoir:
 
         return W @ states if not ret_states else states
 
+    def _run_streaming(self, inputs, nx, W, accumulators, chunk_size):
+        """
+        Chunked engine behind run(accumulators=...): keeps one n x chunk_size
+        buffer of states and hands W @ buffer to every accumulator when it fills.
+        Stops early once any accumulator sets its stop flag.
+        """
+        for acc in accumulators:
+            acc.start(self, nx)
+
+        void_x = np.zeros((self.x_init.shape[0], 4))
+        buf = np.zeros((self.A.shape[0], max(1, min(chunk_size, nx))))
+        buf[:, 0] = self.r.flatten()
+        fill, first = 1, 0
+
+        def flush():
+            chunk = buf[:, :fill]
+            outputs = W @ chunk
+            for acc in accumulators:
+                acc.update(outputs, chunk, first)
+            return any(acc.stop for acc in accumulators)
+
+        for i in range(1, nx):
+            if fill == buf.shape[1]:
+                if flush():
+                    fill = 0
+                    break
+                first, fill = first + fill, 0
+            x = void_x if inputs is None else np.repeat(inputs[:, i - 1 : i], 4, axis=1)
+            self.propagate(x)
+            buf[:, fill] = self.r.flatten()
+            fill += 1
+
+        if fill:
+            flush()
+        for acc in accumulators:
+            acc.finish()
+        return accumulators
+
     """  
     Rsvr Files: pickles a reservoir and saves it to the src/presets dir
     """
@@ -425,8 +888,8 @@ class Reservoir:
     def print(self, precision=2):
         print("--------------------")
         print("Reservoir Parameters")
-        print("A:\n", np.round(self.A, precision))
-        print("B:\n", np.round(self.B, precision))
+        print("A:\n", np.round(_dense(self.A), precision))
+        print("B:\n", np.round(_dense(self.B), precision))
         print("r_init:\n", np.round(self.r_init, precision))
         print("x_init:\n", np.round(self.x_init, precision))
         print("d:\n", np.round(self.d, precision))
@@ -435,7 +898,7 @@ class Reservoir:
         print("global_timescale: ", np.round(self.global_timescale, precision))
         print("1/gamma: ", np.round(1 / self.gamma, precision))
         if self.W is not None:
-            print("W:\n", np.round(self.W, precision))
+            print("W:\n", np.round(_dense(self.W), precision))
         print("--------------------")
 
     def printDims(self):
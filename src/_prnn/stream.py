@@ -0,0 +1,339 @@
+"""
+Streaming accumulators: passed to Reservoir.run(accumulators=[...]) to
+summarise a run chunk by chunk instead of storing the full trajectory.
+"""
+
+import numpy as np
+
+
+class Accumulator:
+    """
+    Base class for online observers of a run.
+    * start(res, n_steps): called once before the first chunk
+    * update(outputs, states, step): called per chunk; outputs is m x c (W @ states),
+      states is n x c and step is the index of the chunk's first column
+    * finish(): called once after the last chunk
+    Setting self.stop = True asks the engine to end the run after the current chunk.
+    """
+
+    stop = False
+
+    def start(self, res, n_steps: int):
+        pass
+
+    def update(self, outputs: np.ndarray, states: np.ndarray, step: int):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+
+class Moments(Accumulator):
+    """Running count, mean, variance, min and max of every readout (Welford/Chan merge)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean: np.ndarray = None
+        self.m2: np.ndarray = None
+        self.min: np.ndarray = None
+        self.max: np.ndarray = None
+
+    def update(self, outputs, states, step):
+        nb = outputs.shape[1]
+        mb = outputs.mean(axis=1)
+        m2b = ((outputs - mb[:, np.newaxis]) ** 2).sum(axis=1)
+
+        if self.count == 0:
+            self.count, self.mean, self.m2 = nb, mb, m2b
+            self.min, self.max = outputs.min(axis=1), outputs.max(axis=1)
+            return
+
+        n = self.count + nb
+        delta = mb - self.mean
+        self.mean = self.mean + delta * nb / n
+        self.m2 = self.m2 + m2b + delta**2 * self.count * nb / n
+        self.count = n
+        self.min = np.minimum(self.min, outputs.min(axis=1))
+        self.max = np.maximum(self.max, outputs.max(axis=1))
+
+    @property
+    def var(self) -> np.ndarray:
+        return self.m2 / max(self.count, 1)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var)
+
+
+class Histogram(Accumulator):
+    """Fixed-bin histogram of every readout; samples outside `range` are counted separately."""
+
+    def __init__(self, bins: int = 50, range: tuple[float, float] = (-1.0, 1.0)):
+        self.edges = np.linspace(range[0], range[1], bins + 1)
+        self.counts: np.ndarray = None
+        self.underflow: np.ndarray = None
+        self.overflow: np.ndarray = None
+
+    def update(self, outputs, states, step):
+        m = outputs.shape[0]
+        if self.counts is None:
+            self.counts = np.zeros((m, len(self.edges) - 1), dtype=np.int64)
+            self.underflow = np.zeros(m, dtype=np.int64)
+            self.overflow = np.zeros(m, dtype=np.int64)
+
+        for i in range(m):
+            self.counts[i] += np.histogram(outputs[i], bins=self.edges)[0]
+        self.underflow += (outputs < self.edges[0]).sum(axis=1)
+        self.overflow += (outputs > self.edges[-1]).sum(axis=1)
+
+
+class Autocorrelation(Accumulator):
+    """
+    Autocorrelation of every readout for lags 0..max_lag. Only the last
+    max_lag samples are carried between chunks.
+    """
+
+    def __init__(self, max_lag: int = 100):
+        self.max_lag = max_lag
+        self._tail: np.ndarray = None
+        self._prod = self._sum_a = self._sum_b = self._count = None
+
+    def update(self, outputs, states, step):
+        m = outputs.shape[0]
+        if self._tail is None:
+            self._tail = np.zeros((m, 0))
+            self._prod = np.zeros((m, self.max_lag + 1))
+            self._sum_a = np.zeros((m, self.max_lag + 1))
+            self._sum_b = np.zeros((m, self.max_lag + 1))
+            self._count = np.zeros(self.max_lag + 1)
+
+        x = np.hstack((self._tail, outputs))
+        new = outputs.shape[1]
+        for k in range(self.max_lag + 1):
+            # pairs (t, t + k) whose later sample lies in this chunk
+            first = max(x.shape[1] - new, k)
+            if first >= x.shape[1]:
+                continue
+            a = x[:, first - k : x.shape[1] - k]
+            b = x[:, first:]
+            self._prod[:, k] += (a * b).sum(axis=1)
+            self._sum_a[:, k] += a.sum(axis=1)
+            self._sum_b[:, k] += b.sum(axis=1)
+            self._count[k] += b.shape[1]
+
+        self._tail = x[:, -self.max_lag :] if self.max_lag else x[:, :0]
+
+    @property
+    def acf(self) -> np.ndarray:
+        """m x (max_lag + 1) normalised autocorrelation; lags without samples are nan."""
+        count = np.where(self._count > 0, self._count, np.nan)
+        cov = (self._prod - self._sum_a * self._sum_b / count) / count
+        return cov / cov[:, :1]
+
+
+def hysteresis_levels(
+    x: np.ndarray, high: float, low: float, prev: np.ndarray
+) -> np.ndarray:
+    """
+    Schmitt-trigger levels of each row of x: +1 once a sample reaches `high`,
+    -1 once it drops below `low`, otherwise the previous level (prev, 0 if unknown).
+    """
+    raw = np.where(x >= high, 1, np.where(x < low, -1, 0)).astype(np.int8)
+    cols = np.arange(x.shape[1])
+    last = np.maximum.accumulate(np.where(raw != 0, cols, -1), axis=1)
+    levels = np.take_along_axis(raw, np.maximum(last, 0), axis=1)
+    return np.where(last >= 0, levels, prev.reshape(-1, 1)).astype(np.int8)
+
+
+class EventEncoder(Accumulator):
+    """
+    Compact output mode for digital readouts: instead of a dense trajectory,
+    records (step, new_level) for every Schmitt-trigger transition of each
+    readout. A readout switches to +1 at >= high and to -1 below low; the first
+    defined level is recorded as an event too.
+    """
+
+    def __init__(self, high: float = 0.05, low: float = -0.05):
+        assert low <= high, "EventEncoder: low must not exceed high"
+        self.high = high
+        self.low = low
+        self._level: np.ndarray = None
+        self._chunks: list[list[np.ndarray]] = None
+
+    def update(self, outputs, states, step):
+        m = outputs.shape[0]
+        if self._level is None:
+            self._level = np.zeros(m, dtype=np.int8)
+            self._chunks = [[] for _ in range(m)]
+
+        levels = hysteresis_levels(outputs, self.high, self.low, self._level)
+        prev = np.hstack((self._level.reshape(-1, 1), levels[:, :-1]))
+        rows, cols = np.nonzero(levels != prev)
+        for i in np.unique(rows):
+            c = cols[rows == i]
+            self._chunks[i].append(np.stack((c + step, levels[i, c]), axis=1))
+        self._level = levels[:, -1]
+
+    @property
+    def events(self) -> list[np.ndarray]:
+        """Per readout, a k x 2 int array of (step, new_level) rows."""
+        return [
+            np.concatenate(c).astype(np.int64) if c else np.zeros((0, 2), np.int64)
+            for c in (self._chunks or [])
+        ]
+
+    def levels_at(self, steps: np.ndarray) -> np.ndarray:
+        """Reconstructs the level of every readout at the given steps (0 = undefined)."""
+        steps = np.asarray(steps)
+        out = np.zeros((len(self.events), steps.size), dtype=np.int8)
+        for i, ev in enumerate(self.events):
+            idx = np.searchsorted(ev[:, 0], steps, side="right") - 1
+            out[i] = np.where(idx >= 0, ev[np.maximum(idx, 0), 1], 0)
+        return out
+
+
+class PeriodDetector(Accumulator):
+    """
+    Online period, amplitude and settle-time estimate for oscillating readouts.
+    * readouts: readout indices to track (default: all)
+    * threshold/hysteresis: a period is the time between upward crossings of
+      threshold, re-armed only after dropping below threshold - hysteresis
+    * confirm: number of consecutive periods that must agree within rtol
+    * auto_stop: end the run once every tracked readout is confirmed
+    * fft_window: samples kept per readout for a short-window FFT estimate
+    Periods are in steps; multiply by dt (the reservoir's global_timescale) for time.
+    """
+
+    def __init__(
+        self,
+        readouts: list[int] = None,
+        threshold: float = 0.0,
+        hysteresis: float = 0.01,
+        confirm: int = 3,
+        rtol: float = 0.02,
+        auto_stop: bool = True,
+        fft_window: int = 4096,
+    ):
+        self.readouts = readouts
+        self.threshold = threshold
+        self.hysteresis = hysteresis
+        self.confirm = confirm
+        self.rtol = rtol
+        self.auto_stop = auto_stop
+        self.fft_window = fft_window
+        self.dt = 1.0
+        self.stop = False
+
+    def start(self, res, n_steps):
+        self.dt = res.global_timescale
+
+    def _init(self, k: int):
+        self._level = np.zeros(k, dtype=np.int8)
+        self._last_x = np.full(k, np.nan)
+        self._crossings = [[] for _ in range(k)]
+        self._periods = [[] for _ in range(k)]
+        self._amps = [[] for _ in range(k)]
+        self._seg_min = np.full(k, np.inf)
+        self._seg_max = np.full(k, -np.inf)
+        self._window = np.zeros((k, 0))
+        self.period = np.full(k, np.nan)
+        self.amplitude = np.full(k, np.nan)
+        self.settle_step = np.full(k, np.nan)
+        self.confirmed = np.zeros(k, dtype=bool)
+
+    def update(self, outputs, states, step):
+        x = outputs if self.readouts is None else outputs[self.readouts]
+        if not hasattr(self, "_level"):
+            self._init(x.shape[0])
+
+        levels = hysteresis_levels(
+            x, self.threshold, self.threshold - self.hysteresis, self._level
+        )
+        prev = np.hstack((self._level.reshape(-1, 1), levels[:, :-1]))
+
+        for i in range(x.shape[0]):
+            ups = np.flatnonzero((prev[i] == -1) & (levels[i] == 1))
+            bounds = np.concatenate(([0], ups, [x.shape[1]]))
+            for j, c in enumerate(ups):
+                # close the period that ends at this crossing
+                seg = x[i, bounds[j] : c]
+                if seg.size:
+                    self._seg_min[i] = min(self._seg_min[i], seg.min())
+                    self._seg_max[i] = max(self._seg_max[i], seg.max())
+                x0 = x[i, c - 1] if c > 0 else self._last_x[i]
+                frac = (
+                    (self.threshold - x0) / (x[i, c] - x0)
+                    if np.isfinite(x0) and x[i, c] != x0
+                    else 0.0
+                )
+                self._cross(i, step + c - 1 + frac)
+            seg = x[i, bounds[-2] :]
+            if seg.size:
+                self._seg_min[i] = min(self._seg_min[i], seg.min())
+                self._seg_max[i] = max(self._seg_max[i], seg.max())
+
+        self._level = levels[:, -1]
+        self._last_x = x[:, -1]
+        self._window = np.hstack((self._window, x))[:, -self.fft_window :]
+        if self.auto_stop and self.confirmed.all():
+            self.stop = True
+
+    def _cross(self, i: int, t: float):
+        crossings = self._crossings[i]
+        if crossings:
+            self._periods[i].append(t - crossings[-1])
+            self._amps[i].append((self._seg_max[i] - self._seg_min[i]) / 2)
+        crossings.append(t)
+        self._seg_min[i], self._seg_max[i] = np.inf, -np.inf
+
+        recent = np.array(self._periods[i][-self.confirm :])
+        if len(recent) < self.confirm:
+            return
+        mean = recent.mean()
+        if np.all(np.abs(recent - mean) <= self.rtol * mean):
+            self.period[i] = mean
+            self.amplitude[i] = np.mean(self._amps[i][-self.confirm :])
+            if not self.confirmed[i]:
+                self.confirmed[i] = True
+                self.settle_step[i] = crossings[-self.confirm - 1]
+        else:
+            self.confirmed[i] = False
+            self.settle_step[i] = np.nan
+
+    @property
+    def period_time(self) -> np.ndarray:
+        return self.period * self.dt
+
+    @property
+    def settle_time(self) -> np.ndarray:
+        return self.settle_step * self.dt
+
+    @property
+    def fft_period(self) -> np.ndarray:
+        """Dominant period (steps) of the last fft_window samples of each readout."""
+        w = self._window - self._window.mean(axis=1, keepdims=True)
+        mag = np.abs(np.fft.rfft(w, axis=1))
+        periods = np.full(w.shape[0], np.nan)
+        for i in range(w.shape[0]):
+            if mag.shape[1] < 3:
+                break
+            k = int(np.argmax(mag[i, 1:])) + 1
+            # parabolic interpolation around the peak bin
+            if 1 <= k < mag.shape[1] - 1:
+                a, b, c = mag[i, k - 1], mag[i, k], mag[i, k + 1]
+                denom = a - 2 * b + c
+                k = k + (0.5 * (a - c) / denom if denom else 0.0)
+            periods[i] = w.shape[1] / k
+        return periods
+
+    def print(self, precision=2):
+        print("--------------------")
+        print("Period Detector")
+        for i in range(len(self.period)):
+            print(
+                f"readout {i}: period={np.round(self.period[i], precision)} steps "
+                f"(fft {np.round(self.fft_period[i], precision)}), "
+                f"amplitude={np.round(self.amplitude[i], precision + 2)}, "
+                f"settle_step={self.settle_step[i]}, confirmed={self.confirmed[i]}"
+            )
+        print("--------------------")
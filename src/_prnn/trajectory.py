@@ -0,0 +1,151 @@
+"""
+On-disk trajectory store: TrajectoryWriter is a streaming accumulator that
+writes states and readouts into memory-mapped .npy files chunk by chunk;
+TrajectoryReader opens them lazily for slicing by time or neuron.
+
+Layout of a trajectory directory:
+* states.npy: steps x n
+* readouts.npy: steps x m
+* meta.json: reservoir hash, dt, input/output names, steps written
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+from _prnn.reservoir import _dense
+from _prnn.stream import Accumulator
+
+META_FILE = "meta.json"
+STATES_FILE = "states.npy"
+READOUTS_FILE = "readouts.npy"
+
+
+def reservoir_hash(res) -> str:
+    """sha256 over the matrices and time constants that determine a reservoir's trajectory"""
+    h = hashlib.sha256()
+    for mat in (res.A, res.B, res.d, res.W, res.r_init, res.x_init):
+        if mat is None:
+            h.update(b"none")
+            continue
+        mat = _dense(mat)
+        h.update(str(mat.shape).encode())
+        h.update(np.ascontiguousarray(mat, dtype=np.float64).tobytes())
+    h.update(f"{float(res.global_timescale)!r}/{float(res.gamma)!r}".encode())
+    return h.hexdigest()
+
+
+class TrajectoryWriter(Accumulator):
+    """
+    Streams a run to disk: run(..., accumulators=[TrajectoryWriter(path)]).
+    * states/readouts: which arrays to store
+    * dtype: storage dtype (float32 halves the footprint)
+    Files are preallocated for the full run; if the run stops early, meta.json
+    records how many steps were actually written.
+    """
+
+    def __init__(self, path: str, states=True, readouts=True, dtype=np.float64):
+        self.path = path
+        self.store_states = states
+        self.store_readouts = readouts
+        self.dtype = dtype
+        self._states = None
+        self._readouts = None
+        self.meta = {}
+        self.written = 0
+
+    def start(self, res, n_steps):
+        os.makedirs(self.path, exist_ok=True)
+        if self.store_states:
+            self._states = np.lib.format.open_memmap(
+                os.path.join(self.path, STATES_FILE),
+                mode="w+",
+                dtype=self.dtype,
+                shape=(n_steps, res.A.shape[0]),
+            )
+        self.meta = {
+            "reservoir_hash": reservoir_hash(res),
+            "dt": float(res.global_timescale),
+            "gamma": float(res.gamma),
+            "input_names": [str(n) for n in res.input_names],
+            "output_names": [str(n) for n in res.output_names],
+            "n_steps": n_steps,
+            "written": 0,
+        }
+        self.written = 0
+        self._write_meta()
+
+    def update(self, outputs, states, step):
+        c = states.shape[1]
+        if self._states is not None:
+            self._states[step : step + c] = states.T
+        if self.store_readouts:
+            if self._readouts is None:
+                self._readouts = np.lib.format.open_memmap(
+                    os.path.join(self.path, READOUTS_FILE),
+                    mode="w+",
+                    dtype=self.dtype,
+                    shape=(self.meta["n_steps"], outputs.shape[0]),
+                )
+            self._readouts[step : step + c] = outputs.T
+        self.written = step + c
+
+    def finish(self):
+        for arr in (self._states, self._readouts):
+            if arr is not None:
+                arr.flush()
+        self._states = self._readouts = None
+        self.meta["written"] = self.written
+        self._write_meta()
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+
+class TrajectoryReader:
+    """
+    Lazy view of a stored trajectory. states/readouts are read-only memmaps
+    (steps x n, steps x m) trimmed to the steps written, so slicing only
+    touches the pages it needs:
+        reader.states[1000:2000, [3, 7]]
+        reader.readout("o1", 0.5, 1.0)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.isfile(meta_path):
+            raise FileNotFoundError(f"No trajectory metadata found at '{meta_path}'")
+        with open(meta_path) as f:
+            self.meta: dict = json.load(f)
+
+        self.dt: float = self.meta["dt"]
+        self.input_names: list[str] = self.meta["input_names"]
+        self.output_names: list[str] = self.meta["output_names"]
+        self.reservoir_hash: str = self.meta["reservoir_hash"]
+        self.n_steps: int = self.meta["written"]
+        self.states = self._open(STATES_FILE)
+        self.readouts = self._open(READOUTS_FILE)
+
+    def _open(self, filename: str):
+        filepath = os.path.join(self.path, filename)
+        if not os.path.isfile(filepath):
+            return None
+        return np.load(filepath, mmap_mode="r")[: self.n_steps]
+
+    def steps(self, t0: float = None, t1: float = None) -> slice:
+        """Step slice covering simulated time [t0, t1)"""
+        start = None if t0 is None else int(np.ceil(t0 / self.dt))
+        stop = None if t1 is None else int(np.ceil(t1 / self.dt))
+        return slice(start, stop)
+
+    def readout(self, name: str, t0: float = None, t1: float = None) -> np.ndarray:
+        """Readout `name` between simulated times t0 and t1"""
+        assert self.readouts is not None, "trajectory has no stored readouts"
+        idx = self.output_names.index(name)
+        return np.asarray(self.readouts[self.steps(t0, t1), idx])
+
+    def matches(self, res) -> bool:
+        """True if this trajectory was produced by a reservoir identical to res"""
+        return reservoir_hash(res) == self.reservoir_hash
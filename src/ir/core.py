@@ -20,6 +20,8 @@ class Core:
         self.inps = set()
         self.prog = prog
         self.funcs: dict[str, Tuple[int, int, Reservoir]] = funcs
+        # preset path -> loaded reservoir, shared by every instance in the graph
+        self.presets: dict[str, Reservoir] = {}
         self.verbose = verbose
 
     def compile_to_cgraph(self) -> CGraph:
@@ -34,7 +36,7 @@ class Core:
 
         return self.graph
 
-    def _process_expr(self, expr: Expr) -> Union[None, Reservoir]:
+    def _process_expr(self, expr: Expr) -> Union[None, str]:
         if self.verbose:
             print(f"Processing opcode: {expr.op}")
         match expr.op:
@@ -78,19 +80,17 @@ class Core:
         names, value = operands
         if self.verbose:
             print(f"LET expression with variables {names} and value {value}")
-        # Strictest version, assume process_operand always returns a reservoir
-        res: Reservoir = self._process_expr(value)
+        # Strictest version, assume process_operand always returns a reservoir node
+        uid: str = self._process_expr(value)
 
         if self.verbose:
-            print(f"Processed LET value, resulting in reservoir: {res.name}")
+            print(f"Processed LET value, resulting in reservoir: {uid}")
 
         for i, name in enumerate(names):
             if self.verbose:
-                print(
-                    f"Binding variable {name} to reservoir output {res.name}, index {i}"
-                )
+                print(f"Binding variable {name} to reservoir output {uid}, index {i}")
             self.graph.add_var(name)
-            self.graph.add_edge(res.name, name, out_idx=i)
+            self.graph.add_edge(uid, name, out_idx=i)
 
     def _handle_input(self, operand: Operand) -> None:
         if self.verbose:
@@ -110,12 +110,13 @@ class Core:
             if self.verbose:
                 print(f"Converted to return variable: {name}")
 
-    def _handle_custom_opcode(self, expr: Expr) -> Reservoir:
+    def _handle_custom_opcode(self, expr: Expr) -> str:
+        """Adds a reservoir node for expr and returns its name"""
         opcode = expr.op
         assert isinstance(opcode, str), "Custom opcode must be a string"
 
-        _, _, res = self._res_from_lib(opcode)
-        self.graph.add_reservoir(res.name, reservoir=res)
+        _, _, uid, res = self._res_from_lib(opcode)
+        self.graph.add_reservoir(uid, reservoir=res)
         # Check operands
         operands = expr.operands
         for i, sym in enumerate(operands):
@@ -124,12 +125,10 @@ class Core:
             if (sym not in self.inps) and (sym not in self.vars):
                 ValueError(f"Used undefined symbol {sym}")
 
-            self.graph.add_edge(sym, res.name, in_idx=i)
+            self.graph.add_edge(sym, uid, in_idx=i)
             if self.verbose:
-                print(
-                    f"Connected operand {sym} to reservoir {res.name} at input index {i}"
-                )
-        return res
+                print(f"Connected operand {sym} to reservoir {uid} at input index {i}")
+        return uid
 
     def _generate_uid(self) -> str:
         """
@@ -141,30 +140,29 @@ class Core:
             print(f"Generated unique reservoir ID: {uid}")
         return uid
 
-    def _res_from_lib(self, opcode: str) -> Tuple[int, int, Reservoir]:
+    def _res_from_lib(self, opcode: str) -> Tuple[int, int, str, Reservoir]:
         """
         Retrieves a reservoir from the library based on the given opcode.
         Searches both rnn_lib (which gets preference) and then self.funcs.
+        Returns a fresh node uid with the shared (read-only) reservoir.
         """
         if opcode in rnn_lib:
             if self.verbose:
                 print(f"Found opcode {opcode} in rnn_lib")
             inp_dim, out_dim, res_path = rnn_lib[opcode]
-            res = Reservoir.load(res_path).copy()
-            res.name = self._generate_uid()
+            if res_path not in self.presets:
+                self.presets[res_path] = Reservoir.load(res_path)
+            uid = self._generate_uid()
             if self.verbose:
-                print(
-                    f"Loaded reservoir from path {res_path}, assigned name {res.name}"
-                )
-            return inp_dim, out_dim, res
+                print(f"Loaded reservoir from path {res_path}, assigned name {uid}")
+            return inp_dim, out_dim, uid, self.presets[res_path]
         elif opcode in self.funcs:
             if self.verbose:
                 print(f"Found opcode {opcode} in self.funcs")
             inp_dim, out_dim, res = self.funcs[opcode]
-            res = res.copy()
-            res.name = self._generate_uid()
+            uid = self._generate_uid()
             if self.verbose:
-                print(f"Created reservoir using function for opcode {res.name}")
-            return inp_dim, out_dim, res
+                print(f"Created reservoir using function for opcode {uid}")
+            return inp_dim, out_dim, uid, res
         else:
             raise ValueError(f"Opcode {opcode} not found in rnn_lib or self.funcs")
@@ -3,6 +3,10 @@ from _frontend.ast_compiler import ASTCompiler
 from _prnn.reservoir import Reservoir
 
 
-def compile(path: str, verbose=False) -> Reservoir:
+def compile(
+    path: str, verbose=False, sparse=False, flatten=False, compact=False
+) -> Reservoir:
     ast = ASTGenerator().read_and_parse(path)
-    return ASTCompiler(verbose=verbose, file=path).compile(ast)
+    return ASTCompiler(
+        verbose=verbose, file=path, sparse=sparse, flatten=flatten, compact=compact
+    ).compile(ast)
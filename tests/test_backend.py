@@ -58,3 +58,170 @@ def test_nand_gate():
         compare_reservoirs(reservoir, reference_res) is True
     ), "Failed to properly generate 'AND' gate"
 
+
+def test_closed_form_basis_matches_jacfwd():
+    import jax
+    import jax.numpy as jnp
+    from _prnn.basis import dnp_basis
+
+    latent, k, eq_pow = 40, 3, 4
+    key = jax.random.PRNGKey(0)
+    B = (jax.random.uniform(key, (latent, k)) - 0.5) / 50
+    d = jnp.arctanh(jax.random.uniform(key, (latent,)) - 0.5)
+    x0 = jnp.zeros(k)
+
+    f = lambda x: jnp.tanh(B @ x + d)
+    ref = [f(x0)[:, None]]
+    for i in range(1, eq_pow + 1):
+        f = jax.jacfwd(f)
+        ref.append(jnp.reshape(f(x0), [latent, k**i], "F"))
+
+    basis = dnp_basis(np.array(B), np.array(d), np.array(x0), eq_pow)
+    assert np.allclose(basis, np.concatenate(ref, axis=1), atol=1e-12)
+
+
+def test_symmetric_compression_preserves_solution():
+    import jax.numpy as jnp
+
+    eq = lambda x: jnp.array([x[0] * x[1] - 0.5 * x[0] ** 2, x[1] ** 3 + x[2]])
+    full = Reservoir.gen_baseRNN(eq, 3, 3, set(), symmetric=False)
+    sym = Reservoir.gen_baseRNN(eq, 3, 3, set(), symmetric=True)
+    assert np.allclose(sym.W, full.W, rtol=1e-6, atol=1e-6 * np.abs(full.W).max())
+
+
+def test_polynomial_coefficients_match_jacfwd():
+    import jax.numpy as jnp
+
+    eq = lambda x: jnp.array([x[0] * x[1] - 0.5 * x[0] ** 2, x[1] ** 3 + x[2]])
+    polys = [
+        (np.array([1.0, -0.5]), np.array([[1, 1, 0], [2, 0, 0]])),
+        (np.array([1.0, 1.0]), np.array([[0, 3, 0], [0, 0, 1]])),
+    ]
+    ref = Reservoir.gen_baseRNN(eq, 3, 4, set())
+    res = Reservoir.gen_baseRNN(polys, 3, 4, set())
+    assert np.allclose(res.W, ref.W, rtol=1e-6, atol=1e-6 * np.abs(ref.W).max())
+
+    o1, s1, s2 = sp.symbols("o1 s1 s2")
+    via_sympy = Reservoir.solve([sp.Eq(o1, s1 * s2 - 0.5 * s1**2)])
+    direct = Reservoir.solve_poly(
+        [(np.array([1.0, -0.5]), np.array([[0, 1, 1], [0, 2, 0]]))],
+        ["o1", "s1", "s2"],
+        ["o1"],
+    )
+    assert via_sympy.input_names == direct.input_names
+    assert np.allclose(via_sympy.W, direct.W)
+
+
+def test_latent_dim_search_shrinks_reservoir():
+    polys = [(np.array([1.0, -0.5]), np.array([[1, 1], [2, 0]]))]
+    full = Reservoir.gen_baseRNN(polys, 2, 3, set())
+    small = Reservoir.gen_baseRNN(polys, 2, 3, set(), latent_dim="auto")
+    assert small.A.shape[0] < full.A.shape[0]
+
+    x = np.repeat(np.array([[0.05, -0.1, 0.08], [0.1, 0.02, -0.06]]), 100, axis=1)
+    outs = []
+    for res in (full, small):
+        res.r = res.r_init.copy()
+        outs.append(res.run(x))
+    assert np.abs(outs[0] - outs[1]).max() <= 1e-3 * np.abs(outs[0]).max()
+
+
+def test_split_solve_matches_unsplit():
+    o1, o2, o3, s1, s2, s3 = sp.symbols("o1 o2 o3 s1 s2 s3")
+    eqs = [sp.Eq(o1, -s2), sp.Eq(o2, s1), sp.Eq(o3, s3)]
+    split = Reservoir.solve(eqs, split=True)
+    whole = Reservoir.solve(eqs)
+    assert split.A.shape[0] < whole.A.shape[0]
+    assert split.input_names == whole.input_names == ["s1", "s2", "s3"]
+    assert split.output_names == whole.output_names
+
+    x = np.repeat(np.array([[0.05], [0.1], [-0.07]]), 1000, axis=1)
+    outs = []
+    for res in (split, whole):
+        res.r = res.r_init.copy()
+        outs.append(res.run(x)[:, -1])
+    assert np.allclose(outs[0], outs[1], atol=1e-3)
+    # o = (-s2, s1, s3) up to the reservoir's gain: a rotation, not a reflection
+    unit = lambda v: np.asarray(v) / np.linalg.norm(v)
+    assert np.allclose(unit(outs[0]), unit([-0.1, 0.05, -0.07]), atol=1e-2)
+
+
+def test_stack_accepts_sparse_constituents():
+    import scipy.sparse
+    from _prnn.circuit import Circuit
+
+    dense, sparse = Reservoir.load("nand"), Reservoir.load("nand")
+    sparse.A, sparse.B, sparse.W = (
+        scipy.sparse.csr_array(M) for M in (dense.A, dense.B, dense.W)
+    )
+    ref = Circuit([], reservoirs=[dense, Reservoir.load("nand")]).stack()
+    res = Circuit([], reservoirs=[dense, sparse]).stack()
+    for key in ("A", "B", "W"):
+        assert np.array_equal(getattr(res, key), getattr(ref, key))
+
+
+def test_lstsq_backends_fit_readout():
+    polys = [(np.array([1.0, -0.5]), np.array([[1, 1, 0], [0, 2, 1]]))]
+    ref = Reservoir.gen_baseRNN(polys, 3, 4, set())
+    assert ref.solve_report.residual < 1e-8
+
+    dense = Reservoir.gen_baseRNN(polys, 3, 4, set(), solver="dense")
+    assert np.allclose(dense.W, ref.W, rtol=1e-6, atol=1e-6 * np.abs(ref.W).max())
+    for solver in ("lsqr", "lsmr", "sketch", "tikhonov"):
+        res = Reservoir.gen_baseRNN(polys, 3, 4, set(), solver=solver)
+        assert res.solve_report.solver == solver
+        assert res.solve_report.residual < 1e-2
+        assert np.isfinite(res.solve_report.cond)
+
+
+def test_solve_many_matches_serial_solve():
+    o1, s1, s2 = sp.symbols("o1 s1 s2")
+    systems = [[sp.Eq(o1, s1 * s2)], ([sp.Eq(o1, s1 - s2)], {"split": False})]
+    pooled, timings = Reservoir.solve_many(systems, processes=2, ret_timings=True)
+    assert len(timings) == 2 and all(t > 0 for t in timings)
+    for res, eqs in zip(pooled, [systems[0], systems[1][0]]):
+        assert np.allclose(res.W, Reservoir.solve(eqs).W)
+
+
+def test_basis_cache_reuses_factorization(tmp_path):
+    import jax.numpy as jnp
+    from _prnn.basis import BasisCache
+
+    cache = BasisCache(directory=str(tmp_path))
+    eq1 = lambda x: jnp.array([x[0] * x[1]])
+    eq2 = lambda x: jnp.array([x[0] - x[1] ** 2])
+    r1 = Reservoir.gen_baseRNN(eq1, 2, 3, set(), cache=cache)
+    r2 = Reservoir.gen_baseRNN(eq2, 2, 3, set(), cache=cache)
+    assert (cache.misses, cache.hits) == (1, 1)
+
+    # a fresh cache on the same directory loads the stored factorization
+    disk = BasisCache(directory=str(tmp_path))
+    r3 = Reservoir.gen_baseRNN(eq2, 2, 3, set(), cache=disk)
+    uncached = Reservoir.gen_baseRNN(eq2, 2, 3, set(), cache=None)
+    assert (disk.misses, disk.hits) == (0, 1)
+    assert np.allclose(r3.W, r2.W) and np.allclose(r3.W, uncached.W)
+    assert np.allclose(r1.B, r2.B)
+
+
+def test_basis_cache_stores_late_factorization(tmp_path):
+    from _prnn.basis import BasisCache
+
+    BasisCache(directory=str(tmp_path)).get(2, 3, 20, factor=False)
+    BasisCache(directory=str(tmp_path)).get(2, 3, 20, factor=True)
+    # the SVD taken after loading the unfactored entry was written back
+    basis = BasisCache(directory=str(tmp_path)).get(2, 3, 20, factor=False)
+    assert basis.s is not None
+
+
+def test_solve_cache_roundtrip(tmp_path):
+    o1, s1, s2 = sp.symbols("o1 s1 s2")
+    eqs = [(o1, s1 * s2 - 0.1 * s1)]
+
+    fresh = Reservoir.solve(eqs, cache_dir=str(tmp_path))
+    cached = Reservoir.solve([sp.Eq(o1, s1 * s2 - 0.1 * s1)], cache_dir=str(tmp_path))
+    assert len(list(tmp_path.glob("*.rsvr"))) == 1
+    assert np.array_equal(fresh.W, cached.W)
+    assert cached.input_names == ["s1", "s2"] and cached.output_names == ["o1"]
+
+    Reservoir.solve(eqs, gamma=50, cache_dir=str(tmp_path))
+    assert len(list(tmp_path.glob("*.rsvr"))) == 2
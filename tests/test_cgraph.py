@@ -0,0 +1,386 @@
+""" 
+Checks CGraph resolution against hand-built composites.
+"""
+
+import pytest
+import numpy as np
+import scipy.sparse
+from _cgraph.cgraph import CGraph
+from _cgraph.passes import eliminate_common
+from _cgraph.resolve import Resolver
+from _prnn.reservoir import Reservoir
+from _prnn.grouped import GroupedEngine
+from ir.core import Core
+from pyres import compile
+from _frontend.res_ast import ASTGenerator
+from _frontend.ast_compiler import ASTCompiler
+from ir.lang import Prog, Expr, Opc
+
+
+def chain_graph():
+    """in_a, in_b -> nand -> v -> nand (second arg, first is constant) -> out"""
+    first, second = Reservoir.load("nand"), Reservoir.load("nand")
+    g = CGraph()
+    g.add_input("in_a")
+    g.add_input("in_b")
+    g.add_input("c", val=0.1)
+    g.add_reservoir("nand_1", first)
+    g.add_reservoir("nand_2", second)
+    g.add_var("v")
+    g.add_var("out")
+    g.add_edge("in_b", "nand_1", in_idx=1)
+    g.add_edge("in_a", "nand_1", in_idx=0)
+    g.add_edge("nand_1", "v", out_idx=0)
+    g.add_edge("v", "nand_2", in_idx=1)
+    g.add_edge("c", "nand_2", in_idx=0)
+    g.add_edge("nand_2", "out", out_idx=0)
+    g.make_return("out")
+    return g, first, second
+
+
+def test_resolver_assembles_by_edge_index():
+    g, first, second = chain_graph()
+    B1, B2, W1 = first.B.copy(), second.B.copy(), first.W.copy()
+    res = Resolver(g).resolve()
+
+    n = first.A.shape[0]
+    assert res.input_names == ["in_a", "in_b"]
+    assert res.output_names == ["out"]
+    assert np.allclose(res.B[:n], B1)
+    assert np.allclose(res.A[n:, :n], np.outer(B2[:, 1], W1[0]))
+    assert np.allclose(res.d[n:], second.d + 0.1 * B2[:, :1])
+    assert np.allclose(res.W[:, n:], second.W)
+    # constituents are left untouched
+    assert np.array_equal(first.B, B1) and np.array_equal(second.B, B2)
+
+
+def test_sparse_resolution_matches_dense():
+    g, _, _ = chain_graph()
+    dense = Resolver(g).resolve()
+    sparse = Resolver(g, sparse=True, sparse_io=True).resolve()
+
+    assert scipy.sparse.issparse(sparse.A) and scipy.sparse.issparse(sparse.W)
+    assert sparse.A.nnz < sparse.A.shape[0] ** 2
+    assert np.allclose(sparse.A.toarray(), dense.A)
+    assert np.allclose(sparse.B.toarray(), dense.B)
+
+    x = np.tile([[1.0], [0.0]], (1, 200))
+    # the presets are stiff (|A| ~ 1e5): matvec round-off differs between formats
+    assert np.allclose(sparse.run(x), dense.run(x), atol=1e-3)
+
+
+def nor_chain_graph():
+    """a, b -> NOR -> x; x, b -> NOR -> y, both nodes sharing one preset"""
+    prog = Prog(
+        [
+            Expr(Opc.INPUT, [["a", "b"]]),
+            Expr(Opc.LET, [["x"], Expr("NOR", ["a", "b"])]),
+            Expr(Opc.LET, [["y"], Expr("NOR", ["x", "b"])]),
+            Expr(Opc.RET, [["y"]]),
+        ]
+    )
+    return Core(prog).compile_to_cgraph()
+
+
+def test_shared_preset_instances_resolve_without_copies():
+    g = nor_chain_graph()
+    nodes = g.nodes_of_type("reservoir")
+    shared = g.get_node(nodes[0])["reservoir"]
+    assert g.get_node(nodes[1])["reservoir"] is shared
+
+    A, B, W = shared.A.copy(), shared.B.copy(), shared.W.copy()
+    res = Resolver(g).resolve()
+    assert res.A.shape[0] == 2 * A.shape[0]
+    assert res.input_names == ["a", "b"] and res.output_names == ["y"]
+    assert np.array_equal(shared.A, A) and np.array_equal(shared.B, B)
+    assert np.array_equal(shared.W, W)
+
+
+def test_instanced_composite_materializes_to_resolved():
+    g = nor_chain_graph()
+    inst = Resolver(g).resolve_instanced()
+    assert len(inst.prototypes) == 1 and list(inst.proto) == [0, 0]
+    assert len(inst.couplings) == 1
+
+    res = Resolver(g).resolve()
+    mat = inst.materialize()
+    assert np.array_equal(mat.A, res.A) and np.array_equal(mat.B, res.B)
+    assert np.array_equal(mat.W, res.W) and np.array_equal(mat.d, res.d)
+    assert np.allclose(inst.materialize(sparse=True).A.toarray(), res.A)
+
+
+def test_grouped_engine_matches_materialized_run():
+    inst = Resolver(nor_chain_graph()).resolve_instanced()
+    res = inst.materialize()
+    x = np.tile([[1.0], [0.0]], (1, 200))
+
+    engine = GroupedEngine(inst)
+    states = engine.run(x, ret_states=True)
+    assert np.allclose(states, res.run(x, ret_states=True), atol=1e-4)
+    assert np.allclose(engine.r, res.r, atol=1e-4)
+    # readouts carry |W| ~ 1e6, so round-off differences are amplified
+    engine.r[:] = 0
+    res.r[:] = 0
+    assert np.allclose(engine.run(x), res.run(x), atol=1e-3)
+
+
+def test_flattened_compile_matches_hierarchical():
+    path = "examples/frontend/src_code/oscillator.pyres"
+    nested = compile(path)
+    flat = compile(path, flatten=True)
+    assert flat.output_names == nested.output_names
+    assert flat.A.shape == nested.A.shape
+    nested.r = nested.r_init.copy()
+    flat.r = flat.r_init.copy()
+    assert np.allclose(flat.run(time=300), nested.run(time=300))
+
+
+RING = """
+from pyres import std
+
+
+def gate(a, b):
+    return std.nor(std.nor(a, b), LEVEL)
+
+
+def tri(i1, i2):
+    o1, t1 = std.fan(gate(i1, i2))
+    o2, o3 = std.fan(t1)
+    return o1, o2, o3
+
+
+def main():
+    n2o1 = None
+    n2o2 = None
+    n1o1, n1o2, n1go = tri(n2o1, n2o2)
+    n2o1, n2o2, n2go = tri(n1o1, n1o2)
+    return n1go, n2go
+"""
+
+
+def test_recompile_patches_changed_function(tmp_path):
+    def parse(level: str):
+        path = tmp_path / "ring.pyres"
+        path.write_text(RING.replace("LEVEL", level))
+        return ASTGenerator().read_and_parse(str(path))
+
+    compiler = ASTCompiler()
+    before = compiler.compile(parse("0.1"))
+    d = before.d.copy()
+    after = compiler.recompile(parse("0.3"))
+    fresh = ASTCompiler().compile(parse("0.3"))
+
+    assert after is before  # same layout: patched in place
+    assert not np.array_equal(after.d, d)
+    for key in ("A", "B", "W", "d"):
+        assert np.array_equal(getattr(after, key), getattr(fresh, key))
+    assert after.output_names == ["n1go", "n2go"]
+
+
+NESTED = """
+from pyres import std
+
+
+def gate(a, b):
+    y = std.nor(a, LEVEL)
+    return std.nor(std.nor(a, b), LEVEL)
+
+
+def tri(i1, i2):
+    o1, t1 = std.fan(gate(i1, std.nor(i2, LEVEL)))
+    o2, o3 = std.fan(t1)
+    return o1, o2, o3
+
+
+def main(a, b):
+    o1, o2, o3 = tri(a, b)
+    return o1, o3
+"""
+
+
+def test_recompile_prunes_nested_changed_functions(tmp_path):
+    def parse(level: str):
+        path = tmp_path / "nested.pyres"
+        path.write_text(NESTED.replace("LEVEL", level))
+        return ASTGenerator().read_and_parse(str(path))
+
+    compiler = ASTCompiler()
+    compiler.compile(parse("0.1"))
+    after = compiler.recompile(parse("0.3"))  # gate and tri both changed
+    fresh = ASTCompiler().compile(parse("0.3"))
+
+    for key in ("A", "B", "W", "d"):
+        assert np.array_equal(getattr(after, key), getattr(fresh, key))
+
+
+SIGNATURE = """
+from pyres import std
+
+
+def g(a):
+    BODY
+
+
+def main(a):
+    x = g(a)
+    return x
+"""
+
+
+def test_recompile_handles_changed_return_count(tmp_path):
+    def parse(body: str):
+        path = tmp_path / "signature.pyres"
+        path.write_text(SIGNATURE.replace("BODY", body))
+        return ASTGenerator().read_and_parse(str(path))
+
+    one = "return std.nand(a, 0.1)"
+    two = "y, z = std.fan(std.nand(a, 0.1))\n    return y, z"
+    compiler = ASTCompiler()
+    compiler.compile(parse(one))
+    after = compiler.recompile(parse(two))
+    fresh = ASTCompiler().compile(parse(two))
+
+    assert after.output_names == fresh.output_names == ["x"]
+    for key in ("A", "B", "W", "d"):
+        assert np.array_equal(getattr(after, key), getattr(fresh, key))
+
+
+def test_compact_graph_compiles_like_networkx():
+    for name in ("sr_latch", "oscillator"):
+        path = f"examples/frontend/src_code/{name}.pyres"
+        ref = compile(path)
+        res = compile(path, compact=True)
+        for key in ("A", "B", "W", "d"):
+            assert np.array_equal(getattr(res, key), getattr(ref, key))
+        assert res.output_names == ref.output_names
+
+
+DEAD = """
+from pyres import std
+
+
+def main(a, b):
+    x, t = std.fan(std.nand(a, b))
+    y = std.nand(t, 0.1)
+    return x
+"""
+
+
+def test_dead_reservoirs_are_eliminated(tmp_path):
+    path = tmp_path / "dead.pyres"
+    path.write_text(DEAD)
+    n = Reservoir.load("nand").A.shape[0] + Reservoir.load("fan").A.shape[0]
+
+    for flatten in (False, True):
+        res = compile(str(path), flatten=flatten)
+        assert res.A.shape == (n, n)
+        assert res.input_names == ["a", "b"] and res.output_names == ["x"]
+        assert res.W.shape[0] == 1
+
+
+UNUSED_ARG = """
+from pyres import std
+
+
+def main(a, b):
+    x = std.nand(a, 0.1)
+    y = std.nand(b, 0.1)
+    return x
+"""
+
+
+def test_argument_feeding_only_dead_code_is_kept(tmp_path):
+    path = tmp_path / "unused_arg.pyres"
+    path.write_text(UNUSED_ARG)
+    n = Reservoir.load("nand").A.shape[0]
+
+    for compact in (False, True):
+        for flatten in (False, True):
+            res = compile(str(path), flatten=flatten, compact=compact)
+            assert res.A.shape == (n, n)
+            assert res.input_names == ["a", "b"] and res.B.shape == (n, 2)
+            assert not np.any(res.B[:, 1])
+
+
+PRUNED_FIRST_ARG = """
+from pyres import std
+
+
+def h(a, b):
+    x = std.nand(a, 0.1)
+    y = std.nand(b, 0.1)
+    return y
+
+
+def main(p, q):
+    return h(p, q)
+"""
+
+ARGS_OUT_OF_ORDER = """
+from pyres import std
+
+
+def h(a, b):
+    return std.nor(b, std.nand(a, 0.1))
+
+
+def main(p, q):
+    return h(p, q)
+"""
+
+
+@pytest.mark.parametrize("src", [PRUNED_FIRST_ARG, ARGS_OUT_OF_ORDER])
+def test_nested_arguments_wire_like_flattened(tmp_path, src):
+    path = tmp_path / "args.pyres"
+    path.write_text(src)
+    nested, flat = compile(str(path)), compile(str(path), flatten=True)
+    assert nested.input_names == flat.input_names == ["p", "q"]
+
+    x = np.repeat(np.array([[0.1], [-0.1]]), 2000, axis=1)
+    np.testing.assert_allclose(nested.run(x), flat.run(x), atol=1e-3)
+
+
+SHARED = """
+from pyres import std
+
+
+def g(u):
+    return std.nor(std.nor(u, 0.1), 0.2)
+
+
+def main(a):
+    p = g(std.nand(a, 0.1))
+    q = g(std.nand(a, 0.1))
+    return p, q
+"""
+
+
+def test_duplicate_calls_are_merged(tmp_path):
+    path = tmp_path / "shared.pyres"
+    path.write_text(SHARED)
+    n = Reservoir.load("nand").A.shape[0] + 2 * Reservoir.load("nor").A.shape[0]
+
+    for flatten in (False, True):
+        res = compile(str(path), flatten=flatten)
+        assert res.A.shape == (n, n)
+        assert res.output_names == ["p", "q"]
+        np.testing.assert_array_equal(res.W[0], res.W[1])
+
+
+def test_recurrent_reservoirs_are_not_merged():
+    g = CGraph()
+    nand = Reservoir.load("nand")
+    g.add_input("a", val=None)
+    for k in (1, 2):
+        # nand_k(a, v_k) with v_k its own readout
+        g.add_reservoir(f"nand_{k}", nand)
+        g.add_var(f"v_{k}")
+        g.add_var(f"o_{k}")
+        g.add_edge(f"nand_{k}", f"v_{k}", out_idx=0)
+        g.add_edge(f"v_{k}", f"nand_{k}", in_idx=1)
+        g.add_edge(f"nand_{k}", f"o_{k}", out_idx=0)
+        g.make_return(f"o_{k}")
+        g.add_edge("a", f"nand_{k}", in_idx=0)
+
+    assert eliminate_common(g) == {}
+    assert len(g.nodes_of_type("reservoir")) == 2
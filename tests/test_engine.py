@@ -0,0 +1,119 @@
+""" 
+Checks the simulation engine extensions (noise ensembles, streaming run) against plain runs.
+"""
+
+import numpy as np
+from _prnn.reservoir import Reservoir
+from _prnn.ensemble import simulate_ensemble
+from _prnn.stream import Moments, Autocorrelation, PeriodDetector, EventEncoder
+from _prnn.trajectory import TrajectoryWriter, TrajectoryReader
+from _prnn.reduce import reduce
+from _utils import inputs
+
+
+def nand_ring() -> Reservoir:
+    """Three nand gates in a ring (see examples/prnn_method/manual_oscillator.py)"""
+    nand = Reservoir.load("nand")
+    n = nand.A.shape[0]
+    o = np.zeros((n, n))
+    c = np.outer(nand.B[:, 0] + nand.B[:, 1], nand.W)
+    res = Reservoir(
+        np.block([[nand.A, o, c], [c, nand.A, o], [o, c, nand.A]]),
+        np.zeros((3 * n, 1)),
+        np.tile(nand.r_init, (3, 1)),
+        np.zeros((1, 1)),
+        nand.global_timescale,
+        nand.gamma,
+        np.tile(nand.d, (3, 1)),
+        np.kron(np.eye(3), nand.W),
+    )
+    res.r = res.r_init.copy()
+    return res
+
+
+def test_ensemble_noise_free_matches_reference():
+    res = Reservoir.load("nor")
+    stats = simulate_ensemble(res, inputs.high_low_inputs(400), n_trials=4)
+    assert np.all(stats.error_rate == 0)
+    assert np.all(stats.max_dev < 1e-6)
+
+
+def test_ensemble_streams_independent_of_chunking():
+    res = Reservoir.load("nor")
+    inp = inputs.high_low_inputs(400)
+    kwargs = dict(n_trials=6, sigma_x=0.05, seed=3, settle=50)
+    a = simulate_ensemble(res, inp, chunk_size=7, **kwargs)
+    b = simulate_ensemble(res, inp, chunk_size=1000, **kwargs)
+    assert np.allclose(a.final_mean, b.final_mean)
+    assert np.allclose(a.max_dev, b.max_dev)
+    assert 0 < a.max_dev[0] < 0.1
+
+    # r- and x-noise together: separate streams keep chunking invisible
+    kwargs.update(sigma_r=0.01)
+    a = simulate_ensemble(res, inp, chunk_size=7, **kwargs)
+    b = simulate_ensemble(res, inp, chunk_size=1000, **kwargs)
+    assert np.allclose(a.final_mean, b.final_mean)
+    assert np.allclose(a.max_dev, b.max_dev)
+
+
+def test_streaming_moments_match_stored_run():
+    inp = inputs.high_low_inputs(600)
+    stored = Reservoir.load("nor").run(inp)
+    moments, acf = Moments(), Autocorrelation(max_lag=5)
+    Reservoir.load("nor").run(inp, accumulators=[moments, acf], chunk_size=64)
+
+    assert moments.count == stored.shape[1]
+    assert np.allclose(moments.mean, stored.mean(axis=1))
+    assert np.allclose(moments.var, stored.var(axis=1))
+    assert np.allclose(moments.max, stored.max(axis=1))
+
+    lag1 = np.corrcoef(stored[0, :-1], stored[0, 1:])[0, 1]
+    assert np.isclose(acf.acf[0, 0], 1.0)
+    assert np.isclose(acf.acf[0, 1], lag1, atol=1e-3)
+
+
+def test_period_detector_auto_stop():
+    detector, moments = PeriodDetector(confirm=3), Moments()
+    nand_ring().run(time=50000, accumulators=[detector, moments], chunk_size=500)
+
+    assert detector.confirmed.all()
+    assert moments.count < 10000
+    assert np.allclose(detector.period, detector.fft_period, rtol=0.05)
+    assert np.all(detector.settle_step < moments.count)
+
+
+def test_event_encoder_matches_dense_levels():
+    inp = inputs.sr_inputs(2000)
+    dense = Reservoir.load("nor").run(inp[:, :3000])
+    encoder = EventEncoder()
+    Reservoir.load("nor").run(inp[:, :3000], accumulators=[encoder], chunk_size=97)
+
+    events = encoder.events[0]
+    assert 0 < len(events) < 20
+    steps = np.arange(dense.shape[1])
+    settled = np.abs(dense[0]) > 0.05
+    assert np.all(encoder.levels_at(steps)[0][settled] == np.sign(dense[0][settled]))
+
+
+def test_trajectory_store_roundtrip(tmp_path):
+    inp = inputs.high_low_inputs(500)
+    states = Reservoir.load("nor").run(inp, ret_states=True)
+    res = Reservoir.load("nor")
+    res.run(inp, accumulators=[TrajectoryWriter(str(tmp_path))], chunk_size=64)
+
+    reader = TrajectoryReader(str(tmp_path))
+    assert reader.n_steps == 500 and reader.matches(Reservoir.load("nor"))
+    assert np.allclose(reader.states[100:200, [3, 7]], states[[3, 7], 100:200].T)
+    assert np.allclose(reader.readout("o1"), res.W @ states)
+
+
+def test_reduce_preserves_gate_readout():
+    res = Reservoir.load("and")
+    x = inputs.high_low_inputs(500)
+    reduced, report = reduce(res, x, tol=0.05)
+    assert report.n_after < report.n_before
+    assert np.all(report.rel_error <= 0.05)
+
+    ref = res.run(x)
+    out = reduced.run(x)
+    assert np.abs(out - ref).max() <= 0.05 * np.abs(ref).max()